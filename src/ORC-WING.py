@@ -1,17 +1,19 @@
-import yfinance as yf
-import math as math
-from numpy import ndarray, array, arange, zeros, ones, argmin, minimum, maximum, clip
-from numpy.linalg import norm
-from numpy.random import normal
-from scipy.interpolate import interp1d
-from scipy.optimize import minimize
-from data import risk_free_rate, options_chain, moneyness_array
-from greeks import Greeks
+from importlib.util import find_spec
+from numpy import ndarray
+from data import moneyness_array
+from greeks import VectorGreeks
+import numpy as np
+import time
+import warnings
+from profiling import profiled, span
 
+# Numba is optional, the NumPy path is used without it; it is only imported when first needed
+_HAS_NUMBA = find_spec('numba') is not None
 
 
 class OrcWingModel:
     @staticmethod
+    @profiled('volskew', rows=len)
     def volskew(moneyness: ndarray, vc: float, sc: float, pc: float, cc: float, dc: float, uc: float, dsm: float,
                  usm: float) -> ndarray:
         
@@ -59,14 +61,7 @@ class OrcWingModel:
         """
         
 
-        #Want to establish our parameter bounds
-        assert 0 < uc < 1  # Upper Cutoff bounds 
-        assert -1 < dc < 0 # Down Cutoff Bounds
-        assert dsm > 0 #Down smoothing range
-        assert usm > 0 #Upper smoothing range
-        assert 1e-6 < vc < 4 #Current Volatility
-        assert -1e6 < sc < 1e6 # This bound is important for the optimisation problem because without it the slope can blow up very quickly
-        assert dc * (1+dsm) <= dc <= 0 <= uc <= uc * (1+usm) # This sets the bounds for each piecewise region in the curve
+        OrcWingModel._check_params(vc, sc, dc, uc, dsm, usm)
 
         volatilities = []
         for x in moneyness: 
@@ -81,7 +76,7 @@ class OrcWingModel:
                 vol = vc - (1 + 1/dsm) * pc * dc**2 - (sc * dc) / (2*dsm) \
                     + (1 + 1/dsm)*(2*pc*dc + sc) * x - (pc/dsm + sc/(2*dc*dsm)) * x**2
                 
-            elif x < dc * (1 + dsm): 
+            elif x <= dc * (1 + dsm): 
                 vol = vc + dc * (2 + dsm) * (sc/2) + (1 + dsm)*pc * dc**2
 
             elif  uc < x <= uc*(1 + usm):
@@ -89,7 +84,7 @@ class OrcWingModel:
                     + (1 + 1/usm)*(2*cc*uc + sc)*x - (cc/usm + sc/(2*uc*usm))*x**2
                 
             elif uc*(1+usm) < x:
-                vol = vc + uc * (1 + usm) * (sc/2) + (1 + usm) * cc * uc**2
+                vol = vc + uc * (2 + usm) * (sc/2) + (1 + usm) * cc * uc**2
 
             else:
                 raise ValueError(f"x = {x} is outside of valid moneyness ranges")
@@ -97,5 +92,449 @@ class OrcWingModel:
             volatilities.append(vol)
         return volatilities
 
-    #@classmethod
-    #def loss_function(cls, x: ndarray, iv: ndarray, vega: ndarray):
+    @staticmethod
+    def _check_params(vc: float, sc: float, dc: float, uc: float, dsm: float, usm: float) -> None:
+        #Want to establish our parameter bounds
+        assert 0 < uc < 1  # Upper Cutoff bounds 
+        assert -1 < dc < 0 # Down Cutoff Bounds
+        assert dsm > 0 #Down smoothing range
+        assert usm > 0 #Upper smoothing range
+        assert 1e-6 < vc < 4 #Current Volatility
+        assert -1e6 < sc < 1e6 # This bound is important for the optimisation problem because without it the slope can blow up very quickly
+        assert dc * (1+dsm) <= dc <= 0 <= uc <= uc * (1+usm) # This sets the bounds for each piecewise region in the curve
+
+    @staticmethod
+    def regions(moneyness: ndarray, dc: float, uc: float, dsm: float, usm: float) -> ndarray:
+        """
+        Label each moneyness point with the piecewise region of the skew it falls in.
+
+        Regions follow the branch order of `volskew`: 0 put wing, 1 call wing,
+        2 down smoothing, 3 down flat, 4 up smoothing, 5 up flat, -1 outside every range.
+        """
+        x = moneyness
+        conditions = [
+            (dc < x) & (x <= 0),
+            (0 < x) & (x <= uc),
+            (dc * (1 + dsm) < x) & (x <= dc),
+            x <= dc * (1 + dsm),
+            (uc < x) & (x <= uc * (1 + usm)),
+            uc * (1 + usm) < x,
+        ]
+        return np.select(conditions, np.arange(6), default=-1)
+
+    @staticmethod
+    def coefficients(vc: float, sc: float, pc: float, cc: float, dc: float, uc: float, dsm: float,
+                     usm: float) -> ndarray:
+        """
+        Every region of the skew is a quadratic a + b*x + c*x**2 in moneyness.
+
+        Returns:
+        ----------
+        ndarray: (6, 3) table of (a, b, c) per region, ordered as in `regions`.
+        """
+        return np.array([
+            [vc, sc, pc],
+            [vc, sc, cc],
+            [vc - (1 + 1/dsm) * pc * dc**2 - (sc * dc) / (2*dsm),
+             (1 + 1/dsm)*(2*pc*dc + sc), -(pc/dsm + sc/(2*dc*dsm))],
+            [vc + dc * (2 + dsm) * (sc/2) + (1 + dsm)*pc * dc**2, 0.0, 0.0],
+            [vc - (1 + 1/usm)*cc* uc**2 - (sc*uc)/(2*usm),
+             (1 + 1/usm)*(2*cc*uc + sc), -(cc/usm + sc/(2*uc*usm))],
+            [vc + uc * (2 + usm) * (sc/2) + (1 + usm) * cc * uc**2, 0.0, 0.0],
+        ])
+
+    @staticmethod
+    @profiled('volskew_array', rows=len)
+    def volskew_array(moneyness: ndarray, vc: float, sc: float, pc: float, cc: float, dc: float, uc: float,
+                      dsm: float, usm: float, use_numba: bool = True) -> ndarray:
+        """
+        Array version of `volskew`, using the same branch formulas (results agree
+        to the last unit of rounding).
+
+        Each point is labelled with its region once and the matching quadratic
+        coefficients are gathered, so there is no Python loop over strikes. When
+        Numba is installed and `use_numba` is True a compiled loop is used instead.
+
+        Returns:
+        ----------
+        ndarray: Calculated volatilities for the different strikes.
+        """
+        OrcWingModel._check_params(vc, sc, dc, uc, dsm, usm)
+        x = np.asarray(moneyness, dtype=np.float64)
+
+        if use_numba and _HAS_NUMBA:
+            volatilities = _compiled_volskew()(x, vc, sc, pc, cc, dc, uc, dsm, usm)
+            bad = np.isnan(volatilities)
+        else:
+            region = OrcWingModel.regions(x, dc, uc, dsm, usm)
+            bad = region < 0
+            a, b, c = OrcWingModel.coefficients(vc, sc, pc, cc, dc, uc, dsm, usm)[region].T
+            volatilities = a + b * x + c * x**2
+
+        if bad.any():
+            raise ValueError(f"x = {x[bad][0]} is outside of valid moneyness ranges")
+        return volatilities
+
+    @staticmethod
+    def coefficient_gradients(vc: float, sc: float, pc: float, cc: float, dc: float, uc: float, dsm: float,
+                              usm: float) -> ndarray:
+        """
+        Closed-form partial derivatives of the `coefficients` table.
+
+        Returns:
+        ----------
+        ndarray: (6, 3, 8) array, d(a, b, c) of each region with respect to
+        (vc, sc, pc, cc, dc, uc, dsm, usm).
+        """
+        grad = np.zeros((6, 3, 8))
+        grad[:, 0, 0] = 1.0  # every constant term moves one-for-one with vc
+        grad[0, 1, 1] = grad[1, 1, 1] = 1.0
+        grad[0, 2, 2] = 1.0
+        grad[1, 2, 3] = 1.0
+        # The down smoothing range depends on (pc, dc, dsm) exactly as the up one depends on (cc, uc, usm)
+        for smooth, curv, cut, sm, i_curv, i_cut, i_sm in ((2, pc, dc, dsm, 2, 4, 6), (4, cc, uc, usm, 3, 5, 7)):
+            alpha = 1 + 1/sm
+            grad[smooth, 0, [1, i_curv, i_cut, i_sm]] = [
+                -cut / (2*sm),
+                -alpha * cut**2,
+                -2 * alpha * curv * cut - sc / (2*sm),
+                curv * cut**2 / sm**2 + sc * cut / (2 * sm**2),
+            ]
+            grad[smooth, 1, [1, i_curv, i_cut, i_sm]] = [
+                alpha,
+                2 * alpha * cut,
+                2 * alpha * curv,
+                -(2*curv*cut + sc) / sm**2,
+            ]
+            grad[smooth, 2, [1, i_curv, i_cut, i_sm]] = [
+                -1 / (2*cut*sm),
+                -1 / sm,
+                sc / (2 * cut**2 * sm),
+                curv / sm**2 + sc / (2 * cut * sm**2),
+            ]
+        # The flat levels are the smoothing quadratics' values at their outer edges
+        for flat, curv, cut, sm, i_curv, i_cut, i_sm in ((3, pc, dc, dsm, 2, 4, 6), (5, cc, uc, usm, 3, 5, 7)):
+            grad[flat, 0, [1, i_curv, i_cut, i_sm]] = [
+                cut * (2 + sm) / 2,
+                (1 + sm) * cut**2,
+                (2 + sm) * sc/2 + 2 * (1 + sm) * curv * cut,
+                cut * sc/2 + curv * cut**2,
+            ]
+        return grad
+
+    @staticmethod
+    def volskew_gradient(moneyness: ndarray, vc: float, sc: float, pc: float, cc: float, dc: float, uc: float,
+                         dsm: float, usm: float):
+        """
+        Volatilities and their parameter Jacobian at every moneyness point.
+
+        Each point is differentiated through the quadratic of the region it
+        currently sits in.
+
+        Returns:
+        ----------
+        tuple: (volatilities of shape (n,), Jacobian of shape (n, 8))
+        """
+        OrcWingModel._check_params(vc, sc, dc, uc, dsm, usm)
+        x = np.asarray(moneyness, dtype=np.float64)
+        region = OrcWingModel._covered_regions(x, dc, uc, dsm, usm)
+
+        params = (vc, sc, pc, cc, dc, uc, dsm, usm)
+        a, b, c = OrcWingModel.coefficients(*params)[region].T
+        ga, gb, gc = np.moveaxis(OrcWingModel.coefficient_gradients(*params)[region], 1, 0)
+        volatilities = a + b * x + c * x**2
+        jacobian = ga + gb * x[:, None] + gc * (x**2)[:, None]
+        return volatilities, jacobian
+
+    @staticmethod
+    def _covered_regions(x: ndarray, dc: float, uc: float, dsm: float, usm: float) -> ndarray:
+        region = OrcWingModel.regions(x, dc, uc, dsm, usm)
+        if (region < 0).any():
+            raise ValueError(f"x = {x[region < 0][0]} is outside of valid moneyness ranges")
+        return region
+
+    @staticmethod
+    def volskew_derivatives(moneyness: ndarray, vc: float, sc: float, pc: float, cc: float, dc: float,
+                            uc: float, dsm: float, usm: float, gradient: bool = False):
+        """
+        Volatilities and their first and second derivatives in moneyness.
+
+        Every region is a quadratic a + b*x + c*x**2, so the derivatives are
+        b + 2*c*x and 2*c, taken on the region each point sits in.
+
+        Returns:
+        ----------
+        tuple: (sigma, dsigma/dx, d2sigma/dx2), each of shape (n,). With
+        `gradient`, followed by their (n, 8) parameter Jacobians in the same order.
+        """
+        OrcWingModel._check_params(vc, sc, dc, uc, dsm, usm)
+        x = np.asarray(moneyness, dtype=np.float64)
+        region = OrcWingModel._covered_regions(x, dc, uc, dsm, usm)
+
+        params = (vc, sc, pc, cc, dc, uc, dsm, usm)
+        a, b, c = OrcWingModel.coefficients(*params)[region].T
+        values = (a + b * x + c * x**2, b + 2 * c * x, 2 * c)
+        if not gradient:
+            return values
+        ga, gb, gc = np.moveaxis(OrcWingModel.coefficient_gradients(*params)[region], 1, 0)
+        col = x[:, None]
+        return values + (ga + gb * col + gc * col**2, gb + 2 * gc * col, 2 * gc)
+
+
+class OrcWingCalibrator:
+    """
+    Fits the ORC-Wing parameters to market implied volatilities.
+
+    The loss is the vega-weighted mean squared IV error, minimised with L-BFGS-B
+    using the closed-form gradient from `OrcWingModel.volskew_gradient`. The last
+    fit for each key (e.g. an expiry) is kept and used as the starting point of
+    the next fit for the same key.
+    """
+
+    PARAM_NAMES = ('vc', 'sc', 'pc', 'cc', 'dc', 'uc', 'dsm', 'usm')
+    BOUNDS = (
+        (1e-4, 3.99),    # vc
+        (-50.0, 50.0),   # sc
+        (-500.0, 500.0), # pc
+        (-500.0, 500.0), # cc
+        (-0.99, -1e-3),  # dc
+        (1e-3, 0.99),    # uc
+        (1e-2, 10.0),    # dsm
+        (1e-2, 10.0),    # usm
+    )
+    # Cold starts put each cutoff at the outermost quote divided by one of these
+    CUTOFF_SCALES = (1.25, 2.5)
+
+    def __init__(self, bounds=None, max_iter: int = 500, tol: float = 1e-12):
+        self.bounds = list(bounds if bounds is not None else self.BOUNDS)
+        self.max_iter = max_iter
+        self.tol = tol
+        self._warm = {}
+
+    @staticmethod
+    def loss(params: ndarray, moneyness: ndarray, iv: ndarray, weights: ndarray):
+        """
+        Vega-weighted squared error and its gradient.
+
+        Parameters
+        ----------
+        params : ndarray
+            (vc, sc, pc, cc, dc, uc, dsm, usm)
+        moneyness : ndarray
+            Log-moneyness log(K/F) of each option.
+        iv : ndarray
+            Market implied volatilities.
+        weights : ndarray
+            Vegas normalised to sum to one.
+
+        Returns
+        ----------
+        tuple: (loss, gradient of shape (8,))
+        """
+        model, jacobian = OrcWingModel.volskew_gradient(moneyness, *params)
+        residual = model - iv
+        weighted = weights * residual
+        return float(weighted @ residual), 2 * (weighted @ jacobian)
+
+    def initial_guess(self, moneyness: ndarray, iv: ndarray, weights: ndarray,
+                      cutoff_scale: tuple = (1.25, 1.25)) -> ndarray:
+        """
+        Cold-start parameters from a weighted quadratic fit of the smile around the money.
+
+        The cutoffs start at the outermost quotes divided by `cutoff_scale` (down, up).
+        With the default smoothing ranges of 0.5 that puts both flat-wing edges beyond
+        the quotes, and any cutoff or edge that lands exactly on a quote is moved off it.
+        """
+        dc = float(np.clip(np.min(moneyness) / cutoff_scale[0], -0.9, -0.05)) if np.min(moneyness) < 0 else -0.2
+        uc = float(np.clip(np.max(moneyness) / cutoff_scale[1], 0.05, 0.9)) if np.max(moneyness) > 0 else 0.2
+        dsm = usm = 0.5
+        while np.isin([dc, dc * (1 + dsm)], moneyness).any():
+            dc *= 1.01
+        while np.isin([uc, uc * (1 + usm)], moneyness).any():
+            uc *= 1.01
+        core = (moneyness > dc) & (moneyness <= uc)
+        if core.sum() >= 3:
+            c, b, a = np.polyfit(moneyness[core], iv[core], 2, w=np.sqrt(weights[core]))
+        else:
+            a, b, c = float(np.average(iv, weights=weights)), 0.0, 0.0
+        x0 = np.array([a, b, c, c, dc, uc, dsm, usm])
+        lower, upper = np.array(self.bounds, dtype=float).T
+        return np.clip(x0, lower, upper)
+
+    def _minimize(self, x0: ndarray, moneyness: ndarray, iv: ndarray, weights: ndarray):
+        from scipy.optimize import minimize
+
+        with span('calibration', rows=moneyness.size):
+            result = minimize(self.loss, np.asarray(x0, dtype=np.float64), args=(moneyness, iv, weights),
+                              jac=True, method='L-BFGS-B', bounds=self.bounds,
+                              options={'maxiter': self.max_iter, 'ftol': self.tol, 'gtol': 1e-10})
+        # A start is only usable if the fitted smile is positive at every calibration strike
+        feasible = bool(np.all(OrcWingModel.volskew_derivatives(moneyness, *result.x)[0] > 0))
+        return result, feasible
+
+    def fit(self, moneyness: ndarray, iv: ndarray, vega: ndarray, key=None, x0=None) -> dict:
+        """
+        Calibrate the ORC-Wing parameters to one smile.
+
+        A warm or explicit start is tried first. Without one, or if it does not
+        converge, the fit is started from each combination of `CUTOFF_SCALES`
+        (see initial_guess) and the lowest loss is kept, converged fits first.
+
+        Parameters
+        ----------
+        moneyness : ndarray
+            Log-moneyness log(K/F) of each option.
+        iv : ndarray
+            Market implied volatilities.
+        vega : ndarray
+            Black-Scholes vega of each option, used as loss weights.
+        key : hashable, optional
+            Identifies the smile (e.g. (ticker, expiry)). The previous fit for the
+            same key is used as the starting point and the result is stored for next time.
+        x0 : ndarray, optional
+            Explicit starting point, overriding any warm start.
+
+        Returns
+        ----------
+        dict: Fitted parameters plus 'loss', 'success' and 'nit'. When no start
+        converges a RuntimeWarning is issued and the best feasible point is
+        returned with 'success' False; a ValueError is raised if there is none.
+        """
+        moneyness = np.asarray(moneyness, dtype=np.float64)
+        iv = np.asarray(iv, dtype=np.float64)
+        vega = np.asarray(vega, dtype=np.float64)
+        keep = np.isfinite(moneyness) & np.isfinite(iv) & np.isfinite(vega) & (iv > 0) & (vega > 0)
+        moneyness, iv, vega = moneyness[keep], iv[keep], vega[keep]
+        if moneyness.size == 0:
+            raise ValueError("No usable options to calibrate")
+        weights = vega / vega.sum()
+
+        if x0 is None:
+            x0 = self._warm.get(key) if key is not None else None
+        cold = [self.initial_guess(moneyness, iv, weights, (down, up))
+                for down in self.CUTOFF_SCALES for up in self.CUTOFF_SCALES]
+
+        best, nit = None, 0
+        for starts in ([x0], cold) if x0 is not None else (cold,):
+            for start in starts:
+                result, feasible = self._minimize(start, moneyness, iv, weights)
+                nit += int(result.nit)
+                if feasible and (best is None or (result.success, -result.fun) > (best.success, -best.fun)):
+                    best = result
+            if best is not None and best.success:
+                break
+
+        if best is None:
+            raise ValueError("Calibration found no parameters with a positive smile at every strike")
+        if not best.success:
+            warnings.warn(f"ORC-Wing fit{f' for {key}' if key is not None else ''} did not converge "
+                          f"({best.message}); returning the best feasible point", RuntimeWarning, stacklevel=2)
+        if key is not None:
+            self._warm[key] = best.x.copy()
+
+        fitted = dict(zip(self.PARAM_NAMES, best.x.tolist()))
+        fitted.update({'loss': float(best.fun), 'success': bool(best.success), 'nit': nit})
+        return fitted
+
+
+def calibration_arrays(options_for_exp, F: float, spot: float, r: float):
+    """
+    Build the moneyness, IV and vega arrays used to calibrate one expiry.
+
+    Keeps the out-of-the-money options plus the strike closest to the forward,
+    drops rows without a usable IV and sorts everything by moneyness.
+
+    Returns
+    ----------
+    tuple: (moneyness, iv, vega) ndarrays
+    """
+    strikes = options_for_exp['strike'].to_numpy(dtype=float)
+    atm = np.abs(strikes - F).argmin()
+    keep = ~options_for_exp['inTheMoney'].to_numpy(dtype=bool)
+    keep[atm] = True
+    selected = options_for_exp[keep]
+
+    iv = selected['impliedVolatility'].to_numpy(dtype=float)
+    T = selected['dte'].to_numpy(dtype=float)
+    moneyness = moneyness_array(selected, F)
+    vega = VectorGreeks(S=spot, T=T, K=selected['strike'].to_numpy(dtype=float), r=r, sigma=iv).all_greeks(
+        selected['Call'].to_numpy(dtype=bool))['vega']
+
+    usable = np.isfinite(iv) & (iv > 0) & np.isfinite(vega)
+    order = np.argsort(moneyness[usable], kind='stable')
+    return moneyness[usable][order], iv[usable][order], vega[usable][order]
+
+
+def _volskew_kernel(x, vc, sc, pc, cc, dc, uc, dsm, usm):
+    # Same branches as OrcWingModel.volskew; points outside every range are left as NaN
+    out = np.empty(x.shape[0])
+    for i in range(x.shape[0]):
+        xi = x[i]
+        if dc < xi <= 0:
+            out[i] = vc + (sc*xi) + (pc*xi**2)
+        elif 0 < xi <= uc:
+            out[i] = vc + (sc*xi) + (cc*xi**2)
+        elif dc * (1 + dsm) < xi <= dc:
+            out[i] = vc - (1 + 1/dsm) * pc * dc**2 - (sc * dc) / (2*dsm) \
+                + (1 + 1/dsm)*(2*pc*dc + sc) * xi - (pc/dsm + sc/(2*dc*dsm)) * xi**2
+        elif xi <= dc * (1 + dsm):
+            out[i] = vc + dc * (2 + dsm) * (sc/2) + (1 + dsm)*pc * dc**2
+        elif uc < xi <= uc*(1 + usm):
+            out[i] = vc - (1 + 1/usm)*cc* uc**2 - (sc*uc)/(2*usm) \
+                + (1 + 1/usm)*(2*cc*uc + sc)*xi - (cc/usm + sc/(2*uc*usm))*xi**2
+        elif uc*(1+usm) < xi:
+            out[i] = vc + uc * (2 + usm) * (sc/2) + (1 + usm) * cc * uc**2
+        else:
+            out[i] = np.nan
+    return out
+
+
+_volskew_compiled = None
+
+
+def _compiled_volskew():
+    # Numba build of _volskew_kernel, compiled on first use
+    global _volskew_compiled
+    if _volskew_compiled is None:
+        from numba import njit
+        _volskew_compiled = njit(cache=True)(_volskew_kernel)
+    return _volskew_compiled
+
+
+def benchmark_volskew(sizes=(100, 1_000, 100_000), repeat=5, params=None) -> dict:
+    """
+    Time the loop `volskew` against `volskew_array` (NumPy and, if available, Numba).
+
+    Returns:
+    ----------
+    dict: Best-of-`repeat` seconds per implementation, keyed by number of strikes.
+    """
+    if params is None:
+        params = dict(vc=0.2, sc=-0.3, pc=0.8, cc=0.4, dc=-0.3, uc=0.25, dsm=0.5, usm=0.5)
+    rng = np.random.default_rng(0)
+    impls = {
+        'loop': lambda x: OrcWingModel.volskew(x, **params),
+        'numpy': lambda x: OrcWingModel.volskew_array(x, **params, use_numba=False),
+    }
+    if _HAS_NUMBA:
+        impls['numba'] = lambda x: OrcWingModel.volskew_array(x, **params, use_numba=True)
+
+    results = {}
+    for n in sizes:
+        x = rng.uniform(-0.8, 0.8, n)
+        results[n] = {}
+        for name, fn in impls.items():
+            fn(x)  # warm up (and trigger compilation)
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn(x)
+                best = min(best, time.perf_counter() - start)
+            results[n][name] = best
+    return results
+
+
+if __name__ == '__main__':
+    for n, timings in benchmark_volskew().items():
+        line = ', '.join(f"{name}: {t * 1e3:.3f} ms" for name, t in timings.items())
+        print(f"{n:>7} strikes -> {line}")
@@ -1,84 +1,149 @@
 import data as dt
-from greeks import Greeks
-import yfinance as yf
+from greeks import VectorGreeks
 import pandas as pd
-import black_scholes as bs
+import numpy as np
+from chain import ChainIndex
+from profiling import profiled
 
 class OptionAnalysis:
-    def __init__(self, ticker):
+    GREEKS = ('delta', 'gamma', 'vega', 'theta', 'rho', 'vomma', 'vanna', 'charm')
+
+    def __init__(self, ticker, context=None):
         self.ticker = ticker
-        self.spot = yf.Ticker(ticker).history(period='1d')['Close'].iloc[-1]
-        self.r = dt.risk_free_rate()
+        context = context if context is not None else dt.market_context(ticker)
+        self.spot = context.spot
+        self.r = context.r
         self.options = dt.options_chain(ticker)
         self.greeks_df = None
+        self._index = None
+        self._columns = None
+
+    @classmethod
+    def from_chain(cls, ticker, options, spot, r):
+        """
+        Build an analysis from an already fetched chain, without any network calls.
+        """
+        analysis = cls.__new__(cls)
+        analysis.ticker = ticker
+        analysis.spot = spot
+        analysis.r = r
+        analysis.options = options
+        analysis.greeks_df = None
+        return analysis
+
+    @property
+    def greeks_df(self):
+        # Built from the column arrays on demand, so market updates only touch arrays
+        if self._greeks_df is None and self._columns is not None:
+            self._greeks_df = pd.DataFrame(self._columns)
+        return self._greeks_df
+
+    @greeks_df.setter
+    def greeks_df(self, frame):
+        self._greeks_df = frame
+        self._columns = None
+        self._index = None
+
+    @profiled('calculate_greeks', rows=len)
+    def calculate_greeks(self, verbose=True):
+        iv = self.options['impliedVolatility'].to_numpy(dtype=float)
+        strike = self.options['strike'].to_numpy(dtype=float)
+        dte = self.options['dte'].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            mask = ~np.isnan(iv) & (iv > 0) & (strike > 0) & (dte > 0) & (self.spot > 0)
+
+        iv, strike, dte = iv[mask], strike[mask], dte[mask]
+        is_call = self.options['Call'].to_numpy(dtype=bool)[mask]
 
-    def calculate_greeks(self):
-        results = []
-        for _, row in self.options.iterrows():
-            iv = row['impliedVolatility']
-            strike = row['strike']
-            dte = row['dte']
-            if pd.isna(iv) or iv <= 0 or strike <= 0 or dte <= 0 or self.spot <= 0:
-                continue
-
-            g = Greeks(S=self.spot, T=dte, K=strike, r=self.r, sigma=iv)
-            primary = g.primary_greeks('call' if row['Call'] else 'put')
-            secondary = g.secondary_greeks()
-            greek_vals = {**primary, **secondary}
-
-            greek_vals.update({
-                'strike': strike,
-                'dte': dte,
-                'Call': row['Call'],
-                'iv': iv
-            })
-            results.append(greek_vals)
-
-        self.greeks_df = pd.DataFrame(results)
-        print('Current spot price is %f' % self.spot)
+        # Terms that do not depend on spot, rate or vol are kept for update_market
+        self._sqrt_T = np.sqrt(dte)
+        self._log_K = np.log(strike)
+
+        g = VectorGreeks(S=self.spot, T=dte, K=strike, r=self.r, sigma=iv, sqrt_T=self._sqrt_T)
+        greek_vals = g.all_greeks(is_call)
+
+        greek_vals.update({
+            'strike': strike,
+            'dte': dte,
+            'Call': is_call,
+            'iv': iv
+        })
+        # Identify contracts so Greeks can be joined back to positions
+        for col in ('contractSymbol', 'expirationDate'):
+            if col in self.options.columns:
+                greek_vals[col] = self.options[col].to_numpy()[mask]
+
+        self.greeks_df = None
+        self._columns = greek_vals
+        if verbose:
+            print('Current spot price is %f' % self.spot)
         return self.greeks_df
+
+    def update_market(self, spot=None, r=None, iv_updates=None):
+        """
+        Refresh the Greeks after a market tick without rebuilding the analysis.
+
+        A new spot or rate moves every Greek of every contract, so all rows are
+        recomputed; IV updates alone only recompute the rows they touch. sqrt(T)
+        and log(K) are reused from calculate_greeks.
+
+        Args:
+            spot (float): New spot price, if it changed
+            r (float): New risk-free rate, if it changed
+            iv_updates (dict or pd.Series): New implied volatility by greeks_df row
+
+        greeks_df is rebuilt from the updated arrays the next time it is read.
+        """
+        if self._columns is None:
+            raise RuntimeError("calculate_greeks must be run before update_market")
+        columns = self._columns
+
+        rows = None
+        if iv_updates is not None and len(iv_updates):
+            iv_updates = pd.Series(iv_updates, dtype=float)
+            rows = iv_updates.index.to_numpy(dtype=np.intp)
+            columns['iv'][rows] = iv_updates.to_numpy()
+
+        market_moved = (spot is not None and spot != self.spot) or (r is not None and r != self.r)
+        self.spot = spot if spot is not None else self.spot
+        self.r = r if r is not None else self.r
+        if market_moved:
+            rows = slice(None)
+        elif rows is None:
+            return
+
+        g = VectorGreeks(S=self.spot, T=columns['dte'][rows], K=columns['strike'][rows], r=self.r,
+                         sigma=columns['iv'][rows], sqrt_T=self._sqrt_T[rows],
+                         log_SK=np.log(self.spot) - self._log_K[rows])
+        for name, values in g.all_greeks(columns['Call'][rows]).items():
+            columns[name][rows] = values
+
+        self._greeks_df = None
+        self._index = None
     
     def current_price(self):
         price = int(self.spot)
         return price
     
+    @property
+    def index(self):
+        """
+        Sorted strike/DTE index over greeks_df, built on first use.
+        """
+        if self._index is None:
+            self._index = ChainIndex(self.greeks_df)
+        return self._index
+
     def closest_strike(self, num_strikes=5):
-        strikes = self.options['strike'].unique()
-        differences = {}   
-
-        for strike in strikes:
-            differences[strike] = abs(strike - self.spot)
-
-        closest = sorted(differences, key=differences.get)[:num_strikes]
-
-        filtered_df_calls = self.greeks_df[
-           (self.greeks_df['strike'].isin(closest)) & (self.greeks_df['Call'] == True)
-           ].copy()
-        
-        filtered_df_puts = self.greeks_df[
-           (self.greeks_df['strike'].isin(closest)) & (self.greeks_df['Call'] == False)
-           ].copy()
-        
-        return filtered_df_calls.sort_values(by=['strike', 'dte']), filtered_df_puts.sort_values(by=['strike', 'dte'])
+        index = self.index
+        return index.strike_window(self.spot, num_strikes, call=True), index.strike_window(self.spot, num_strikes, call=False)
     
-    def dte_pick(self, num_dte=3):
-        dtes = self.options['dte'].unique()
-        # Convert 90, 180, 270 days into year fractions
-        targets = [90/365, 180/365, 270/365]
+    def dte_pick(self, num_dte=3, targets=None):
+        # Default targets are 90, 180, 270, ... days, converted into year fractions
+        if targets is None:
+            targets = [90 * (i + 1) / 365 for i in range(num_dte)]
 
         # Find closest DTE for each target
-        closest = {target: min(dtes, key=lambda x: abs(x - target)) for target in targets}
-
-        # Get the list of closest values
-        closest_dtes = list(closest.values())
-
-        # Filter the Greeks DataFrame
-        filtered_df_calls = self.greeks_df[
-            (self.greeks_df['dte'].isin(closest_dtes)) & (self.greeks_df['Call'] == True)
-        ].copy()
-
-        filtered_df_puts = self.greeks_df[
-            (self.greeks_df['dte'].isin(closest_dtes)) & (self.greeks_df['Call'] == False)
-        ].copy()
+        closest_dtes = self.index.nearest_dtes(targets)
 
-        return filtered_df_calls.sort_values(by=['dte', 'strike']), filtered_df_puts.sort_values(by=['dte', 'strike'])
+        return self.index.dte_rows(closest_dtes, call=True), self.index.dte_rows(closest_dtes, call=False)
@@ -0,0 +1,302 @@
+from importlib import import_module
+import numpy as np
+import pandas as pd
+from numpy import ndarray
+
+orc_wing = import_module('ORC-WING')
+OrcWingModel = orc_wing.OrcWingModel
+PARAM_NAMES = list(orc_wing.OrcWingCalibrator.PARAM_NAMES)
+
+# Log-moneyness log(K/F) at which the fitted smiles are checked
+K_GRID = np.linspace(-1.0, 1.0, 401)
+# Region on each side of the edges dc*(1+dsm), dc, 0, uc, uc*(1+usm), numbered as in OrcWingModel.regions
+_LEFT = np.array([3, 2, 0, 1, 4])
+_RIGHT = np.array([2, 0, 1, 4, 5])
+
+
+def durrleman_g(k, T, sigma, dsigma, d2sigma, gradient: bool = False):
+    """
+    Durrleman's butterfly condition g(k) for the total variance w(k) = sigma(k)**2 * T.
+
+        g(k) = (1 - k w' / (2w))**2 - w'**2 / 4 * (1/w + 1/4) + w'' / 2
+
+    The smile is free of butterfly arbitrage where g(k) >= 0 (the implied
+    density is non-negative). Inputs broadcast against each other.
+
+    Returns
+    ----------
+    ndarray: g(k). With `gradient`, a tuple (g, dg/dsigma, dg/dsigma', dg/dsigma'').
+    """
+    w = sigma**2 * T
+    w1 = 2 * sigma * dsigma * T
+    w2 = 2 * T * (dsigma**2 + sigma * d2sigma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        A = 1 - k * w1 / (2 * w)
+        g = A**2 - w1**2 / 4 * (1 / w + 0.25) + w2 / 2
+        if not gradient:
+            return g
+        g_w = A * k * w1 / w**2 + w1**2 / (4 * w**2)
+        g_w1 = -A * k / w - w1 / 2 * (1 / w + 0.25)
+    g_w2 = 0.5
+    g_sigma = g_w * 2 * sigma * T + g_w1 * 2 * dsigma * T + g_w2 * 2 * T * d2sigma
+    g_dsigma = g_w1 * 2 * sigma * T + g_w2 * 4 * T * dsigma
+    g_d2sigma = g_w2 * 2 * T * sigma
+    return g, g_sigma, g_dsigma, g_d2sigma
+
+
+def smile_arrays(params, k_grid=K_GRID):
+    """
+    sigma, dsigma/dk and d2sigma/dk2 of many fitted smiles on one moneyness grid.
+
+    Parameters
+    ----------
+    params : array-like
+        (n, 8) ORC-Wing parameters, one row per smile.
+    k_grid : ndarray, optional
+        Log-moneyness points.
+
+    Returns
+    ----------
+    tuple: three (n, len(k_grid)) arrays. Regions and coefficients are gathered
+    for all smiles at once; there is no loop over strikes.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+    k = np.asarray(k_grid, dtype=np.float64)[None, :]
+    vc, sc, pc, cc, dc, uc, dsm, usm = (params[:, i, None] for i in range(8))
+
+    region = OrcWingModel.regions(k, dc, uc, dsm, usm)
+    if (region < 0).any():
+        raise ValueError("Smile parameters leave part of the moneyness grid uncovered")
+
+    a, b, c = np.moveaxis(np.take_along_axis(_coefficient_table(params), region[..., None], axis=1), -1, 0)
+    return a + b * k + c * k**2, b + 2 * c * k, 2 * c
+
+
+def _coefficient_table(params: ndarray) -> ndarray:
+    # (n, 6, 3) quadratic coefficients of every region of every smile
+    if len(params) == 0:
+        return np.empty((0, 6, 3))
+    return np.stack([OrcWingModel.coefficients(*p) for p in params])
+
+
+def edge_jumps(params):
+    """
+    Jumps in vol across the region edges of many smiles.
+
+    The edges are dc*(1+dsm), dc, 0, uc and uc*(1+usm). At each one the
+    quadratics on either side are evaluated and the right limit minus the left
+    limit is returned. Durrleman's g(k) is only evaluated inside regions, so it
+    cannot see these jumps, yet any jump in total variance is a static
+    arbitrage: call prices would be discontinuous in strike.
+
+    Parameters
+    ----------
+    params : array-like
+        (n, 8) ORC-Wing parameters, one row per smile.
+
+    Returns
+    ----------
+    tuple: (edges, jumps), both (n, 5).
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+    vc, sc, pc, cc, dc, uc, dsm, usm = params.T
+    zero = np.zeros_like(dc)
+    edges = np.stack([dc * (1 + dsm), dc, zero, uc, uc * (1 + usm)], axis=1)
+
+    table = _coefficient_table(params)
+    powers = np.stack([np.ones_like(edges), edges, edges**2], axis=-1)  # (n, 5, 3)
+    left, right = table[:, _LEFT], table[:, _RIGHT]
+    jumps = np.einsum('nec,nec->ne', right - left, powers)
+    return edges, jumps
+
+
+def _runs(mask: ndarray) -> tuple:
+    # Contiguous True runs in each row of a 2-D mask, as (row, start, stop) with stop exclusive
+    edges = np.diff(np.pad(mask, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, stops = np.nonzero(edges == -1)
+    return rows, starts, stops
+
+
+def check_surface(surface: pd.DataFrame, k_grid=K_GRID, tol: float = 1e-8) -> dict:
+    """
+    Butterfly and calendar arbitrage diagnostics for a calibrated surface.
+
+    Butterfly: Durrleman's g(k) must be non-negative (and the vol positive) on
+    the grid, and the vol must not jump across any region edge inside the grid
+    (see edge_jumps). Calendar: at every k, total variance sigma(k)**2 * T must
+    not fall from one expiry to the next of the same ticker.
+
+    Parameters
+    ----------
+    surface : pd.DataFrame
+        Output of surface.build_surface: a (ticker, expiry) index with a 'T'
+        column and the ORC-Wing parameter columns. Rows that failed to fit are skipped.
+    k_grid : ndarray, optional
+        Log-moneyness points to check.
+    tol : float, optional
+        Violations smaller than this are ignored.
+
+    Returns
+    ----------
+    dict: 'g' and 'total_variance' as (expiries, len(k_grid)) arrays for the
+    checked rows ('index'), 'edges' and 'jumps' as (expiries, 5) arrays, per-row
+    'butterfly' and 'calendar' flags, and 'violations', a DataFrame with one row
+    per contiguous violating k-range: ticker, expiry, kind, k_start, k_end and
+    the worst value in the range. A jump is a butterfly row with k_start ==
+    k_end at the edge, and minus the absolute vol jump as its worst value.
+    """
+    k_grid = np.asarray(k_grid, dtype=np.float64)
+    ok = surface[PARAM_NAMES + ['T']].notna().all(axis=1).to_numpy()
+    checked = surface[ok].sort_values(['ticker', 'T'], kind='stable')
+    T = checked['T'].to_numpy(dtype=np.float64)[:, None]
+
+    sigma, dsigma, d2sigma = smile_arrays(checked[PARAM_NAMES].to_numpy(dtype=np.float64), k_grid)
+    g = durrleman_g(k_grid[None, :], T, sigma, dsigma, d2sigma)
+    g[~(sigma > 0)] = np.nan  # a non-positive vol is itself a violation
+    total_variance = sigma**2 * T
+
+    # Each row is compared with the previous expiry of the same ticker
+    tickers = checked.index.get_level_values('ticker').to_numpy()
+    has_prev = np.zeros(len(checked), dtype=bool)
+    has_prev[1:] = tickers[1:] == tickers[:-1]
+    calendar_gap = np.full_like(total_variance, np.inf)
+    calendar_gap[has_prev] = (total_variance[1:] - total_variance[:-1])[has_prev[1:]]
+
+    edges, jumps = edge_jumps(checked[PARAM_NAMES].to_numpy(dtype=np.float64))
+    jumped = (np.abs(jumps) > tol) & (edges >= k_grid[0]) & (edges <= k_grid[-1])
+
+    butterfly = ~(g >= -tol)
+    calendar = calendar_gap < -tol
+    records = []
+    for kind, mask, values in (('butterfly', butterfly, g), ('calendar', calendar, calendar_gap)):
+        for row, start, stop in zip(*_runs(mask)):
+            ticker, expiry = checked.index[row]
+            records.append({'ticker': ticker, 'expiry': expiry, 'kind': kind, 'k_start': k_grid[start],
+                            'k_end': k_grid[stop - 1], 'worst': float(np.min(values[row, start:stop]))})
+    for row, edge in zip(*np.nonzero(jumped)):
+        ticker, expiry = checked.index[row]
+        records.append({'ticker': ticker, 'expiry': expiry, 'kind': 'butterfly', 'k_start': edges[row, edge],
+                        'k_end': edges[row, edge], 'worst': -abs(float(jumps[row, edge]))})
+
+    return {
+        'index': checked.index,
+        'k_grid': k_grid,
+        'g': g,
+        'total_variance': total_variance,
+        'edges': edges,
+        'jumps': jumps,
+        'butterfly': butterfly.any(axis=1) | jumped.any(axis=1),
+        'calendar': calendar.any(axis=1),
+        'violations': pd.DataFrame(records, columns=['ticker', 'expiry', 'kind', 'k_start', 'k_end', 'worst']),
+    }
+
+
+class ArbitrageFreeCalibrator(orc_wing.OrcWingCalibrator):
+    """
+    OrcWingCalibrator with penalties for butterfly and calendar arbitrage.
+
+    On top of the vega-weighted IV error the loss adds
+
+        penalty * mean(min(g(k), 0)**2) + penalty * mean(min((w(k) - floor(k)) / T, 0)**2)
+
+    over a moneyness grid, where w is the fitted total variance and floor the
+    total variance of the previous expiry, if given. Both terms have closed-form
+    gradients through `OrcWingModel.volskew_derivatives`.
+    """
+
+    def __init__(self, penalty: float = 10.0, k_grid=K_GRID, **kwargs):
+        super().__init__(**kwargs)
+        self.penalty = penalty
+        self.k_grid = np.asarray(k_grid, dtype=np.float64)
+        self._T = None
+        self._floor = None
+
+    def loss(self, params: ndarray, moneyness: ndarray, iv: ndarray, weights: ndarray):
+        value, grad = orc_wing.OrcWingCalibrator.loss(params, moneyness, iv, weights)
+        k, T = self.k_grid, self._T
+        sigma, dsigma, d2sigma, j_sigma, j_dsigma, j_d2sigma = OrcWingModel.volskew_derivatives(
+            k, *params, gradient=True)
+        scale = self.penalty / k.size
+
+        g, g_sigma, g_dsigma, g_d2sigma = durrleman_g(k, T, sigma, dsigma, d2sigma, gradient=True)
+        shortfall = np.minimum(np.nan_to_num(g, nan=0.0), 0.0)
+        value += scale * float(shortfall @ shortfall)
+        grad = grad + 2 * scale * (shortfall * g_sigma) @ j_sigma + 2 * scale * (shortfall * g_dsigma) @ j_dsigma \
+            + 2 * scale * (shortfall * g_d2sigma) @ j_d2sigma
+
+        if self._floor is not None:
+            gap = np.minimum((sigma**2 * T - self._floor) / T, 0.0)
+            value += scale * float(gap @ gap)
+            grad = grad + 2 * scale * (gap * 2 * sigma) @ j_sigma
+
+        return value, grad
+
+    def fit(self, moneyness: ndarray, iv: ndarray, vega: ndarray, T: float = None, floor: ndarray = None,
+            key=None, x0=None) -> dict:
+        """
+        Penalised fit of one smile.
+
+        Parameters
+        ----------
+        T : float
+            Time to expiry of the smile, in years.
+        floor : ndarray, optional
+            Total variance of the previous expiry on `k_grid`; the fit is pushed to stay above it.
+
+        The other parameters and the result are as for OrcWingCalibrator.fit.
+        """
+        if T is None or T <= 0:
+            raise ValueError("A positive time to expiry is needed to check the smile for arbitrage")
+        self._T, self._floor = float(T), floor
+        try:
+            return super().fit(moneyness, iv, vega, key=key, x0=x0)
+        finally:
+            self._T, self._floor = None, None
+
+
+def repair_surface(surface: pd.DataFrame, tasks, k_grid=K_GRID, penalty: float = 10.0,
+                   tol: float = 1e-8) -> tuple:
+    """
+    Re-fit, with arbitrage penalties, the expiries that check_surface flags.
+
+    Expiries are walked in order of T per ticker, so each re-fit is floored by
+    the already accepted (possibly re-fitted) expiry before it.
+
+    Parameters
+    ----------
+    surface : pd.DataFrame
+        Output of surface.build_surface.
+    tasks : list
+        The calibration tasks (key, moneyness, iv, vega, x0) the surface was fitted
+        from, e.g. from surface.expiry_tasks.
+    k_grid, penalty, tol :
+        As for check_surface and ArbitrageFreeCalibrator.
+
+    Returns
+    ----------
+    tuple: (repaired surface with a 'repaired' column, check_surface report of the repaired surface)
+    """
+    report = check_surface(surface, k_grid, tol)
+    flagged = pd.Series(report['butterfly'] | report['calendar'], index=report['index'])
+    inputs = {key: (moneyness, iv, vega) for key, moneyness, iv, vega, _ in tasks}
+    calibrator = ArbitrageFreeCalibrator(penalty=penalty, k_grid=k_grid)
+
+    repaired = surface.copy()
+    repaired['repaired'] = False
+    floor, last_ticker = None, None
+    for key in report['index']:
+        ticker = key[0]
+        if ticker != last_ticker:
+            floor, last_ticker = None, ticker
+        row = repaired.loc[key]
+        T = float(row['T'])
+        if flagged[key] and key in inputs:
+            fit = calibrator.fit(*inputs[key], T=T, floor=floor,
+                                 x0=row[PARAM_NAMES].to_numpy(dtype=np.float64))
+            for name, value in fit.items():
+                repaired.loc[key, name] = value
+            repaired.loc[key, 'repaired'] = True
+        sigma = OrcWingModel.volskew_derivatives(k_grid, *repaired.loc[key, PARAM_NAMES].to_numpy(dtype=np.float64))[0]
+        floor = sigma**2 * T
+    return repaired, check_surface(repaired, k_grid, tol)
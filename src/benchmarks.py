@@ -0,0 +1,314 @@
+"""
+Offline benchmark suite for the pricing, Greeks, volskew and calibration hot paths.
+
+Runs every benchmark on synthetic chains of 1k/10k/100k contracts, records the
+best wall time over several repeats and the peak traced memory of one extra
+call, and writes the results as JSON so runs on different commits can be diffed:
+
+    python benchmarks.py --out bench.json
+    python benchmarks.py --out new.json --compare bench.json
+
+`--startup` instead measures each library module's import time in a fresh
+interpreter (python -X importtime) and exits non-zero if one is over its
+budget or pulls in a dependency that should only load on first use. `--memory`
+checks ScenarioEngine's peak traced memory against its max_bytes the same way.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from importlib import import_module
+import numpy as np
+import pandas as pd
+from black_scholes import BlackScholes, VectorBlackScholes
+from greeks import Greeks, VectorGreeks, GreekWorkspace
+from analysis import OptionAnalysis
+from data import moneyness_array
+
+orc_wing = import_module('ORC-WING')
+OrcWingModel = orc_wing.OrcWingModel
+
+SMILE = dict(vc=0.2, sc=-0.3, pc=0.8, cc=0.4, dc=-0.3, uc=0.25, dsm=0.5, usm=0.5)
+REFERENCE_DATE = datetime.datetime(2025, 1, 2)
+
+
+def synthetic_chain(n: int, spot: float = 100.0, seed: int = 0) -> pd.DataFrame:
+    """
+    A deterministic chain of `n` contracts in the options_chain layout, with IVs on an ORC-Wing smile.
+    """
+    rng = np.random.default_rng(seed)
+    days = rng.choice(np.arange(7, 730, 7), size=n)
+    expiry = pd.to_datetime(REFERENCE_DATE.date()) + pd.to_timedelta(days, unit='D')
+    strike = np.round(spot * np.exp(rng.uniform(-0.6, 0.6, n)), 1)
+    is_call = rng.random(n) < 0.5
+    iv = OrcWingModel.volskew_array(np.log(strike / spot), **SMILE)
+    T = days / 365
+    price = VectorBlackScholes(spot, T, strike, 0.04, iv).option_price(is_call)
+    symbols = [f"SYN{e:%y%m%d}{'C' if c else 'P'}{int(k * 1000):08d}" for e, c, k in zip(expiry, is_call, strike)]
+    return pd.DataFrame({
+        'contractSymbol': symbols,
+        'strike': strike,
+        'bid': price * 0.99,
+        'ask': price * 1.01,
+        'mid': price,
+        'impliedVolatility': iv,
+        'inTheMoney': np.where(is_call, strike < spot, strike > spot),
+        'expirationDate': expiry,
+        'dte': T,
+        'Call': is_call,
+    })
+
+
+def _setup(n: int) -> dict:
+    chain = synthetic_chain(n)
+    moneyness = np.log(chain['strike'].to_numpy() / 100.0)
+    vega = VectorGreeks(100.0, chain['dte'], chain['strike'], 0.04, chain['impliedVolatility']).all_greeks(
+        chain['Call'])['vega']
+    return {'chain': chain, 'moneyness': moneyness, 'vega': vega,
+            'iv': chain['impliedVolatility'].to_numpy(), 'rows': chain.to_dict('records')}
+
+
+def _scalar_price(ctx):
+    for row in ctx['rows']:
+        BlackScholes(100.0, row['dte'], row['strike'], 0.04, row['impliedVolatility']).price()
+
+
+def _scalar_greeks(ctx):
+    for row in ctx['rows']:
+        g = Greeks(100.0, row['dte'], row['strike'], 0.04, row['impliedVolatility'])
+        g.primary_greeks('call' if row['Call'] else 'put')
+        g.secondary_greeks()
+
+
+def _calibrate(ctx, calibrator=None):
+    calibrator = calibrator if calibrator is not None else orc_wing.OrcWingCalibrator()
+    return calibrator.fit(ctx['moneyness'], ctx['iv'], ctx['vega'], key='bench')
+
+
+def _warm_calibrate(ctx):
+    if 'calibrator' not in ctx:
+        ctx['calibrator'] = orc_wing.OrcWingCalibrator()
+        _calibrate(ctx, ctx['calibrator'])
+    return _calibrate(ctx, ctx['calibrator'])
+
+
+# name -> (function of the prepared context, runs per contract in pure Python)
+BENCHMARKS = {
+    'BlackScholes.price': (_scalar_price, True),
+    'Greeks.primary_secondary': (_scalar_greeks, True),
+    'VectorBlackScholes.price': (lambda ctx: VectorBlackScholes(
+        100.0, ctx['chain']['dte'], ctx['chain']['strike'], 0.04, ctx['iv']).price(), False),
+    'VectorGreeks.all_greeks': (lambda ctx: VectorGreeks(
+        100.0, ctx['chain']['dte'], ctx['chain']['strike'], 0.04, ctx['iv']).all_greeks(ctx['chain']['Call']), False),
+    'GreekWorkspace.evaluate (float64)': (lambda ctx: GreekWorkspace(dtype=np.float64).evaluate(
+        100.0, ctx['chain']['dte'], ctx['chain']['strike'], 0.04, ctx['iv'], ctx['chain']['Call']), False),
+    'GreekWorkspace.evaluate (float32)': (lambda ctx: GreekWorkspace(dtype=np.float32).evaluate(
+        100.0, ctx['chain']['dte'], ctx['chain']['strike'], 0.04, ctx['iv'], ctx['chain']['Call']), False),
+    'OptionAnalysis.calculate_greeks': (lambda ctx: OptionAnalysis.from_chain(
+        'SYN', ctx['chain'], 100.0, 0.04).calculate_greeks(verbose=False), False),
+    'OrcWingModel.volskew': (lambda ctx: OrcWingModel.volskew(ctx['moneyness'], **SMILE), True),
+    'OrcWingModel.volskew_array': (lambda ctx: OrcWingModel.volskew_array(ctx['moneyness'], **SMILE), False),
+    'moneyness_array': (lambda ctx: moneyness_array(ctx['chain'], 101.0), False),
+    'OrcWingCalibrator.fit (cold)': (_calibrate, False),
+    'OrcWingCalibrator.fit (warm)': (_warm_calibrate, False),
+}
+
+
+def run(sizes=(1_000, 10_000, 100_000), repeat: int = 5, scalar_limit: int = 10_000, only=None) -> dict:
+    """
+    Run the suite; returns {benchmark: {size: {'seconds', 'peak_bytes'}}}.
+
+    Pure-Python per-contract loops are skipped above `scalar_limit` contracts.
+    """
+    results = {}
+    for n in sizes:
+        ctx = _setup(n)
+        for name, (fn, scalar) in BENCHMARKS.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            if scalar and n > scalar_limit:
+                continue
+            fn(ctx)  # warm up
+            best = float('inf')
+            for _ in range(1 if scalar else repeat):
+                start = time.perf_counter()
+                fn(ctx)
+                best = min(best, time.perf_counter() - start)
+
+            tracemalloc.start()
+            fn(ctx)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.setdefault(name, {})[str(n)] = {'seconds': best, 'peak_bytes': peak}
+    return results
+
+
+def float32_accuracy(n: int = 1_000_000, seed: int = 1) -> dict:
+    """
+    Largest float32 error of GreekWorkspace against float64 VectorGreeks, relative to each output's largest value.
+
+    Contracts span +/-60% log-moneyness, 1 day to 2 years and 5% to 100% vol.
+    """
+    rng = np.random.default_rng(seed)
+    K = 100.0 * np.exp(rng.uniform(-0.6, 0.6, n))
+    T = rng.uniform(1 / 365, 2.0, n)
+    sigma = rng.uniform(0.05, 1.0, n)
+    is_call = rng.random(n) < 0.5
+
+    reference = VectorGreeks(100.0, T, K, 0.04, sigma).all_greeks(is_call)
+    reference['price'] = VectorBlackScholes(100.0, T, K, 0.04, sigma).option_price(is_call)
+    low = GreekWorkspace(dtype=np.float32).evaluate(100.0, T, K, 0.04, sigma, is_call, price=True)
+    return {name: float(np.max(np.abs(low[name] - ref)) / np.max(np.abs(ref))) for name, ref in reference.items()}
+
+
+# (positions, (spot, vol, time) grid, max_bytes, greeks): many small positions, a few with huge grids,
+# and a single position whose grid alone is larger than the cap
+SCENARIO_MEMORY_CASES = (
+    (2_000, (41, 21, 31), 16 * 2**20, ('delta', 'gamma', 'vega', 'theta')),
+    (3, (160, 100, 10), 16 * 2**20, ('delta', 'gamma', 'vega', 'theta')),
+    (1, (400, 100, 10), 32 * 2**20, ()),
+)
+
+
+def scenario_memory(cases=SCENARIO_MEMORY_CASES, dtypes=(np.float64, np.float32)) -> dict:
+    """
+    Peak traced memory of ScenarioEngine.run against its max_bytes; 'ok' is False if any case goes over.
+    """
+    from scenario import ScenarioEngine
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for n, grid, max_bytes, greeks in cases:
+        engine = ScenarioEngine(S=100.0, K=100.0 * np.exp(rng.uniform(-0.3, 0.3, n)), T=rng.uniform(0.05, 1.0, n),
+                                sigma=rng.uniform(0.1, 0.5, n), is_call=rng.random(n) < 0.5, qty=1, r=0.04)
+        shocks = (np.linspace(-0.2, 0.2, grid[0]), np.linspace(-0.1, 0.1, grid[1]), np.arange(grid[2]))
+        for dtype in dtypes:
+            tracemalloc.start()
+            engine.run(*shocks, greeks=greeks, max_bytes=max_bytes, dtype=dtype)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            name = f"{n}x{'x'.join(map(str, grid))}/{len(greeks)} greeks/{np.dtype(dtype).name}"
+            results[name] = {'peak_bytes': peak, 'max_bytes': max_bytes, 'ok': peak <= max_bytes}
+    return {'cases': results, 'ok': all(case['ok'] for case in results.values())}
+
+
+# Cumulative import time allowed per module, in ms; pandas alone accounts for most of it
+STARTUP_BUDGET_MS = {
+    'black_scholes': 150,
+    'greeks': 150,
+    'data': 750,
+    'analysis': 750,
+    'ORC-WING': 800,
+    'main': 800,
+    'surface': 800,
+}
+# Loaded on first use only; importing any library module must not pull these in
+LAZY_MODULES = ('yfinance', 'matplotlib', 'seaborn', 'scipy.stats', 'scipy.optimize', 'scipy.interpolate', 'numba')
+
+
+def import_time(module: str, repeat: int = 3) -> dict:
+    """
+    Best-of-`repeat` cumulative import time of `module` in a fresh interpreter, and any LAZY_MODULES it loaded.
+    """
+    code = (f"import json, sys; __import__({module!r}); "
+            f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))")
+    best, eager = float('inf'), []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        for line in proc.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == module:
+                best = min(best, int(parts[1]) / 1e3)
+        eager = json.loads(proc.stdout)
+    return {'ms': best, 'eager': eager}
+
+
+def check_startup(budgets: dict = None) -> dict:
+    """
+    Import time of every module against its budget; 'ok' is False if any is over or loads a lazy dependency.
+    """
+    budgets = budgets if budgets is not None else STARTUP_BUDGET_MS
+    modules = {}
+    for module, budget in budgets.items():
+        measured = import_time(module)
+        measured.update({'budget_ms': budget, 'ok': measured['ms'] <= budget and not measured['eager']})
+        modules[module] = measured
+    return {'modules': modules, 'ok': all(m['ok'] for m in modules.values())}
+
+
+def _metadata() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {'commit': commit or None, 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'timestamp': datetime.datetime.now().isoformat()}
+
+
+def compare(new: dict, old: dict) -> pd.DataFrame:
+    """
+    Time and memory ratios (new / old) for every benchmark and size present in both runs.
+    """
+    rows = []
+    for name, by_size in new['results'].items():
+        for size, stats in by_size.items():
+            before = old['results'].get(name, {}).get(size)
+            if before is None:
+                continue
+            rows.append({'benchmark': name, 'size': int(size),
+                         'time_ratio': stats['seconds'] / before['seconds'],
+                         'memory_ratio': stats['peak_bytes'] / max(before['peak_bytes'], 1)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scalar-limit', type=int, default=10_000)
+    parser.add_argument('--only', nargs='*', help='Run benchmarks whose name contains any of these')
+    parser.add_argument('--out', default='bench.json')
+    parser.add_argument('--compare', help='Earlier JSON result to diff against')
+    parser.add_argument('--startup', action='store_true', help='Only check import times against their budgets')
+    parser.add_argument('--accuracy', action='store_true', help='Also measure float32 error against float64')
+    parser.add_argument('--memory', action='store_true', help='Only check ScenarioEngine peak memory against max_bytes')
+    args = parser.parse_args()
+
+    if args.memory:
+        memory = scenario_memory()
+        for name, stats in memory['cases'].items():
+            print(f"{name:<36} {stats['peak_bytes'] / 2**20:8.2f} MiB / {stats['max_bytes'] / 2**20:.0f} MiB  "
+                  f"{'ok' if stats['ok'] else 'OVER'}")
+        sys.exit(0 if memory['ok'] else 1)
+
+    if args.startup:
+        startup = check_startup()
+        for module, stats in startup['modules'].items():
+            eager = f"  loads {', '.join(stats['eager'])}" if stats['eager'] else ''
+            print(f"{module:<16} {stats['ms']:8.1f} ms / {stats['budget_ms']} ms  "
+                  f"{'ok' if stats['ok'] else 'OVER'}{eager}")
+        sys.exit(0 if startup['ok'] else 1)
+
+    report = {'metadata': _metadata(),
+              'results': run(args.sizes, args.repeat, args.scalar_limit, args.only)}
+    if args.accuracy:
+        report['float32_accuracy'] = float32_accuracy()
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, by_size in report['results'].items():
+        for size, stats in by_size.items():
+            print(f"{name:<36} {size:>7}  {stats['seconds'] * 1e3:10.3f} ms  {stats['peak_bytes'] / 2**20:8.2f} MiB")
+
+    for name, error in report.get('float32_accuracy', {}).items():
+        print(f"float32 {name:<28} {error:10.2e} of scale")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)).to_string(index=False))
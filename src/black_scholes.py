@@ -1,5 +1,34 @@
+import math
 import numpy as np
-from scipy.stats import norm
+
+_SQRT_2 = math.sqrt(2.0)
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+_ndtr = None
+
+
+def norm_cdf(x, out=None):
+    """
+    Standard normal CDF. Scalars use math.erfc; arrays use scipy.special.ndtr, imported on first use.
+
+    For arrays the result keeps the input dtype and may be written into `out`.
+    """
+    global _ndtr
+    if np.ndim(x) == 0 and out is None:
+        return 0.5 * math.erfc(-x / _SQRT_2)
+    if _ndtr is None:
+        from scipy.special import ndtr
+        _ndtr = ndtr
+    return _ndtr(x, out=out)
+
+
+def norm_pdf(x):
+    """
+    Standard normal PDF.
+    """
+    if np.ndim(x) == 0:
+        return math.exp(-0.5 * x * x) * _INV_SQRT_2PI
+    return np.exp(-0.5 * np.square(x)) * _INV_SQRT_2PI
+
 
 class BlackScholes:
 
@@ -29,11 +58,84 @@ class BlackScholes:
     def price(self):
         # Check if d2 and d1 have been calculated
         # Calculate Black Scholes Option Pricing for both calls and puts 
-        call = self.S * norm.cdf(self.d1) - self.K * np.exp(-self.r * self.T) * norm.cdf(self.d2)
-        put = -self.S * norm.cdf(-self.d1) + self.K * np.exp(-self.r * self.T) * norm.cdf(-self.d2)
+        call = self.S * norm_cdf(self.d1) - self.K * np.exp(-self.r * self.T) * norm_cdf(self.d2)
+        put = -self.S * norm_cdf(-self.d1) + self.K * np.exp(-self.r * self.T) * norm_cdf(-self.d2)
 
         return call, put
-    
+
+
+class VectorBlackScholes:
+    """
+    Array-native Black-Scholes pricer for whole option chains.
+
+    Takes NumPy arrays (or DataFrame columns) of S, T, K, r and sigma, which are
+    broadcast against each other. Instead of raising on bad inputs like
+    BlackScholes, invalid elements are flagged in the `valid` mask and priced as NaN.
+    Everything is computed in `dtype` (float64 by default, or float32).
+    """
+
+    def __init__(self, S, T, K, r, sigma, sqrt_T=None, log_SK=None, dtype=np.float64):
+        # sqrt_T and log_SK = log(S/K) may be passed in when they are cached between calls
+        S, T, K, r, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=dtype) for a in (S, T, K, r, sigma)))
+        self.S = S
+        self.T = T
+        self.K = K
+        self.r = r
+        self.sigma = sigma
+        with np.errstate(invalid='ignore'):
+            self.valid = (S > 0) & (K > 0) & (T > 0) & (sigma > 0) & np.isfinite(r)
+        self._sqrt_T = None if sqrt_T is None else np.where(self.valid, sqrt_T, np.nan)
+        self._log_SK = log_SK
+        self._discount = None
+        self._d1 = None
+        self._d2 = None
+
+    @property
+    def sqrt_T(self):
+        if self._sqrt_T is None:
+            self._sqrt_T = np.sqrt(np.where(self.valid, self.T, np.nan))
+        return self._sqrt_T
+
+    @property
+    def discount(self):
+        if self._discount is None:
+            self._discount = np.exp(-self.r * self.T)
+        return self._discount
+
+    @property
+    def d1(self):
+        if self._d1 is None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_SK = np.log(self.S / self.K) if self._log_SK is None else self._log_SK
+                self._d1 = (log_SK + (self.r + 0.5 * self.sigma**2) * self.T) / (self.sigma * self.sqrt_T)
+        return self._d1
+
+    @property
+    def d2(self):
+        if self._d2 is None:
+            self._d2 = self.d1 - self.sigma * self.sqrt_T
+        return self._d2
+
+    def price(self):
+        # Same formulas as BlackScholes.price, evaluated elementwise; invalid rows come out as NaN
+        call = self.S * norm_cdf(self.d1) - self.K * self.discount * norm_cdf(self.d2)
+        put = -self.S * norm_cdf(-self.d1) + self.K * self.discount * norm_cdf(-self.d2)
+
+        return call, put
+
+    def option_price(self, is_call):
+        """
+        Price each contract as a call or a put according to `is_call`.
+
+        Args:
+            is_call (array-like of bool): True for calls, False for puts
+
+        Returns:
+            ndarray: Option prices, NaN where the inputs are invalid
+        """
+        call, put = self.price()
+        return np.where(np.asarray(is_call, dtype=bool), call, put)
+
 """
 
 CHECKER
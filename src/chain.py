@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+# OCC option symbol: root, expiry YYMMDD, C/P, strike * 1000 as 8 digits
+CALL_SYMBOL = r'\d{6}C\d{8}$'
+
+
+def is_call_symbol(symbols: pd.Series) -> np.ndarray:
+    """
+    Vectorized call/put flag parsed from OCC contract symbols.
+    """
+    return symbols.str.contains(CALL_SYMBOL, regex=True).to_numpy(dtype=bool)
+
+
+class OptionChain:
+    """
+    Compact, array-backed option chain.
+
+    Contracts are sorted by (expiry, put/call, strike) and held in contiguous
+    arrays. `offsets[i]:offsets[i + 1]` is the row range of expiry `i`, so
+    `expiry(i)` returns another OptionChain made of zero-copy views.
+    """
+
+    FLOAT_FIELDS = ('strike', 'bid', 'ask', 'mid', 'iv', 'dte')
+    FIELDS = FLOAT_FIELDS + ('days', 'is_call', 'expiry_index')
+
+    def __init__(self, strike, bid, ask, mid, iv, dte, days, is_call, expiry_index, expiries, offsets,
+                 symbols=None):
+        self.strike = strike              # float64
+        self.bid = bid                    # float64
+        self.ask = ask                    # float64
+        self.mid = mid                    # float64
+        self.iv = iv                      # float64
+        self.dte = dte                    # float64, years
+        self.days = days                  # int32, calendar days to expiry
+        self.is_call = is_call            # bool
+        self.expiry_index = expiry_index  # int32 code into expiries
+        self.expiries = expiries          # datetime64, one per expiry
+        self.offsets = offsets            # int64, len(expiries) + 1
+        self.symbols = symbols            # optional contract symbols
+
+    @classmethod
+    def from_frame(cls, options: pd.DataFrame, keep_symbols: bool = True) -> 'OptionChain':
+        """
+        Build from an options_chain DataFrame.
+        """
+        expiry_codes, expiries = pd.factorize(options['expirationDate'], sort=True)
+        if 'Call' in options.columns:
+            is_call = options['Call'].to_numpy(dtype=bool)
+        else:
+            is_call = is_call_symbol(options['contractSymbol'])
+        strike = options['strike'].to_numpy(dtype=np.float64)
+
+        # np.lexsort sorts by the last key first
+        order = np.lexsort((strike, is_call, expiry_codes))
+        column = lambda name: np.ascontiguousarray(options[name].to_numpy(dtype=np.float64)[order])
+        dte = column('dte')
+
+        counts = np.bincount(expiry_codes, minlength=len(expiries))
+        offsets = np.zeros(len(expiries) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        symbols = options['contractSymbol'].to_numpy()[order] if keep_symbols else None
+        return cls(
+            strike=np.ascontiguousarray(strike[order]),
+            bid=column('bid'),
+            ask=column('ask'),
+            mid=column('mid'),
+            iv=column('impliedVolatility'),
+            dte=dte,
+            days=np.rint(dte * 365).astype(np.int32),
+            is_call=np.ascontiguousarray(is_call[order]),
+            expiry_index=expiry_codes[order].astype(np.int32),
+            expiries=np.asarray(expiries, dtype='datetime64[ns]'),
+            offsets=offsets,
+            symbols=symbols,
+        )
+
+    def __len__(self) -> int:
+        return self.strike.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.FIELDS) + self.offsets.nbytes
+
+    def expiry(self, i: int) -> 'OptionChain':
+        """
+        The contracts of expiry `i` as views into this chain's arrays.
+        """
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        views = {name: getattr(self, name)[start:stop] for name in self.FIELDS}
+        views['expiry_index'] = np.broadcast_to(np.int32(0), stop - start)  # a single expiry: every code is 0
+        return OptionChain(**views, expiries=self.expiries[i:i + 1], offsets=np.array([0, stop - start]),
+                           symbols=self.symbols[start:stop] if self.symbols is not None else None)
+
+    def expiry_slices(self):
+        """
+        Yield (expiry date, row slice) for every expiry.
+        """
+        for i, expiry in enumerate(self.expiries):
+            yield expiry, slice(self.offsets[i], self.offsets[i + 1])
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Convert back to the DataFrame layout used by options_chain.
+        """
+        frame = pd.DataFrame({
+            'strike': self.strike,
+            'bid': self.bid,
+            'ask': self.ask,
+            'mid': self.mid,
+            'impliedVolatility': self.iv,
+            'expirationDate': self.expiries[self.expiry_index],
+            'dte': self.dte,
+            'Call': self.is_call,
+        })
+        if self.symbols is not None:
+            frame.insert(0, 'contractSymbol', self.symbols)
+        return frame
+
+
+class ChainIndex:
+    """
+    Sorted index over a per-contract frame (e.g. OptionAnalysis.greeks_df) for
+    nearest-strike and nearest-DTE queries.
+
+    The frame is laid out twice, grouped by (Call, strike, dte) and by
+    (Call, dte, strike). Any run of neighbouring strikes, or any single DTE, is
+    then a contiguous block found with np.searchsorted in O(log n) and returned
+    as an iloc slice of the sorted frame rather than a filtered copy.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        is_call = frame['Call'].to_numpy(dtype=bool)
+        strike = frame['strike'].to_numpy(dtype=np.float64)
+        dte = frame['dte'].to_numpy(dtype=np.float64)
+
+        by_strike = np.lexsort((dte, strike, is_call))
+        by_dte = np.lexsort((strike, dte, is_call))
+        self.by_strike = frame.iloc[by_strike].reset_index(drop=True)
+        self.by_dte = frame.iloc[by_dte].reset_index(drop=True)
+        self._strike_key = strike[by_strike]
+        self._dte_key = dte[by_dte]
+        # Puts (False) sort before calls (True); both layouts share the split point
+        self._split = int(np.count_nonzero(~is_call))
+
+        self.strikes = np.unique(strike)
+        self.dtes = np.unique(dte)
+
+    def _side(self, call: bool) -> slice:
+        return slice(self._split, len(self._strike_key)) if call else slice(0, self._split)
+
+    def nearest_strikes(self, target: float, n: int) -> np.ndarray:
+        """
+        The `n` distinct strikes closest to `target`, in ascending order (ties go to the lower strike).
+        """
+        strikes = self.strikes
+        hi = int(np.searchsorted(strikes, target))
+        lo = hi - 1
+        for _ in range(min(n, len(strikes))):
+            if hi >= len(strikes) or (lo >= 0 and target - strikes[lo] <= strikes[hi] - target):
+                lo -= 1
+            else:
+                hi += 1
+        return strikes[lo + 1:hi]
+
+    def nearest_dtes(self, targets) -> np.ndarray:
+        """
+        The closest available DTE to each target (ties go to the shorter DTE).
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        dtes = self.dtes
+        if len(dtes) < 2:
+            return np.full(targets.shape, dtes[0] if len(dtes) else np.nan)
+        right = np.clip(np.searchsorted(dtes, targets), 1, len(dtes) - 1)
+        left = right - 1
+        use_right = np.abs(dtes[right] - targets) < np.abs(targets - dtes[left])
+        return dtes[np.where(use_right, right, left)]
+
+    def strike_window(self, target: float, n: int, call: bool) -> pd.DataFrame:
+        """
+        Rows for the `n` strikes nearest `target` on one side, sorted by (strike, dte).
+        """
+        strikes = self.nearest_strikes(target, n)
+        side = self._side(call)
+        if len(strikes) == 0:
+            return self.by_strike.iloc[0:0]
+        keys = self._strike_key[side]
+        start = side.start + int(np.searchsorted(keys, strikes[0], side='left'))
+        stop = side.start + int(np.searchsorted(keys, strikes[-1], side='right'))
+        return self.by_strike.iloc[start:stop]
+
+    def dte_rows(self, dtes, call: bool) -> pd.DataFrame:
+        """
+        Rows whose DTE is in `dtes` on one side, sorted by (dte, strike).
+
+        A single DTE, or DTEs adjacent in the index, come back as one slice; otherwise
+        the slices are concatenated.
+        """
+        side = self._side(call)
+        keys = self._dte_key[side]
+        dtes = np.unique(np.asarray(dtes, dtype=np.float64))
+        starts = side.start + np.searchsorted(keys, dtes, side='left')
+        stops = side.start + np.searchsorted(keys, dtes, side='right')
+
+        ranges = []
+        for start, stop in zip(starts, stops):
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = stop
+            elif stop > start:
+                ranges.append([start, stop])
+        if len(ranges) <= 1:
+            start, stop = ranges[0] if ranges else (0, 0)
+            return self.by_dte.iloc[start:stop]
+        return pd.concat([self.by_dte.iloc[start:stop] for start, stop in ranges])
@@ -0,0 +1,217 @@
+"""
+Batch run of the full pipeline: fetch -> forward -> moneyness -> Greeks -> ORC-Wing fit.
+
+Takes everything from the command line and never prompts, so it can run from
+cron or a pipeline:
+
+    python cli.py SPY AAPL --min-dte 7 --max-dte 90 --workers 4 --cache-dir ~/.options_cache --out-dir runs/today
+
+Writes greeks.parquet (one row per contract, with its forward and moneyness)
+and fits.parquet (one row of ORC-Wing parameters per ticker and expiry) to
+--out-dir, plus summary.json with the arguments, per-ticker counts and the
+wall time of each stage. With --profile the span summary table is printed and
+saved as profile.csv, next to a Chrome trace. Exits non-zero when no expiry is
+selected.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import data as dt
+import profiling
+from analysis import OptionAnalysis
+from surface import expiry_tasks, calibrate_tasks
+
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    # Wall time of one pipeline stage, also recorded as a span when profiling is on
+    start = time.perf_counter()
+    with profiling.span(f"cli.{name}"):
+        yield
+    timings[name] = round(time.perf_counter() - start, 6)
+
+
+def select_expiries(options: pd.DataFrame, expiries=None, min_dte: float = None, max_dte: float = None,
+                    max_expiries: int = None) -> pd.DataFrame:
+    """
+    Rows of the chain whose expiry passes the filters.
+
+    Parameters
+    ----------
+    options : pd.DataFrame
+        Output of data.options_chains.
+    expiries : list of str, optional
+        Expiration dates to keep (YYYY-MM-DD); all by default.
+    min_dte, max_dte : float, optional
+        Inclusive bounds on days to expiry.
+    max_expiries : int, optional
+        Keep only the nearest this many remaining expiries of each ticker.
+
+    Returns
+    ----------
+    pd.DataFrame: The selected rows, in their original order.
+    """
+    days = options['dte'].to_numpy(dtype=float) * 365
+    keep = days > 0
+    if expiries:
+        wanted = pd.to_datetime(list(expiries)).normalize()
+        keep &= options['expirationDate'].dt.normalize().isin(wanted).to_numpy()
+    if min_dte is not None:
+        keep &= days >= min_dte
+    if max_dte is not None:
+        keep &= days <= max_dte
+    selected = options[keep]
+    if max_expiries is not None:
+        rank = selected.groupby('ticker')['expirationDate'].rank(method='dense')
+        selected = selected[(rank <= max_expiries).to_numpy()]
+    return selected
+
+
+def run(tickers, out_dir: str, expiries=None, min_dte: float = None, max_dte: float = None,
+        max_expiries: int = None, workers: int = None) -> dict:
+    """
+    Run every stage for all selected expiries of all tickers and write the results.
+
+    Parameters
+    ----------
+    tickers : list of str
+        Yahoo Finance ticker symbols.
+    out_dir : str
+        Directory for greeks.parquet, fits.parquet and summary.json.
+    expiries, min_dte, max_dte, max_expiries :
+        Expiry filters, as for select_expiries.
+    workers : int, optional
+        Processes to calibrate with. Defaults to the number of CPUs; 1 runs in-process.
+
+    Returns
+    ----------
+    dict: The run summary that was written to summary.json.
+    """
+    started = datetime.datetime.now()
+    timings, per_ticker = {}, {}
+    os.makedirs(out_dir, exist_ok=True)
+
+    with _stage(timings, 'fetch'):
+        chains = dt.options_chains(tickers)
+        contexts = {ticker: dt.market_context(ticker) for ticker in tickers}
+        markets = {ticker: (float(context.spot), float(context.r)) for ticker, context in contexts.items()}
+
+    options = select_expiries(chains, expiries, min_dte, max_dte, max_expiries).reset_index(drop=True)
+    groups = options.groupby('ticker', sort=False).indices  # ticker -> row positions
+
+    with _stage(timings, 'forward'):
+        # One forward per expiry, broadcast back onto its rows
+        forward = np.empty(len(options))
+        for ticker, rows in groups.items():
+            T, inverse = np.unique(options['dte'].to_numpy(dtype=float)[rows], return_inverse=True)
+            forward[rows] = np.atleast_1d(dt.forward_price(ticker, T, context=contexts[ticker]))[inverse]
+        options['forward'] = forward
+
+    with _stage(timings, 'moneyness'):
+        options['moneyness'] = dt.moneyness_array(options, options['forward'].to_numpy())
+
+    frames = []
+    with _stage(timings, 'greeks'):
+        for ticker, rows in groups.items():
+            spot, r = markets[ticker]
+            chain = options.iloc[rows]
+            greeks = OptionAnalysis.from_chain(ticker, chain, spot, r).calculate_greeks(verbose=False)
+            extra = chain[['contractSymbol', 'forward', 'moneyness']]
+            frames.append(greeks.merge(extra, on='contractSymbol', how='left').assign(ticker=ticker))
+    greeks = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    with _stage(timings, 'fit'):
+        tasks, info = [], {}
+        for ticker, rows in groups.items():
+            ticker_tasks, ticker_info = expiry_tasks(ticker, options.iloc[rows], *markets[ticker])
+            tasks.extend(ticker_tasks)
+            info.update(ticker_info)
+        fits = calibrate_tasks(tasks, info, workers).reset_index()
+
+    with _stage(timings, 'write'):
+        outputs = {'greeks': os.path.join(out_dir, 'greeks.parquet'),
+                   'fits': os.path.join(out_dir, 'fits.parquet')}
+        greeks.to_parquet(outputs['greeks'], index=False)
+        fits.to_parquet(outputs['fits'], index=False)
+
+    for ticker in tickers:
+        success = fits.loc[fits['ticker'] == ticker, 'success'].astype(bool)
+        per_ticker[ticker] = {
+            'spot': markets[ticker][0],
+            'r': markets[ticker][1],
+            'contracts': int((chains['ticker'] == ticker).sum()),
+            'selected_contracts': int(len(groups.get(ticker, ()))),
+            'expiries': int(options['expirationDate'].iloc[groups.get(ticker, [])].nunique()),
+            'fitted': int(success.sum()),
+            'failed': int((~success).sum()),
+        }
+
+    summary = {
+        'started': started.isoformat(timespec='seconds'),
+        'arguments': {'tickers': list(tickers), 'expiries': list(expiries or []), 'min_dte': min_dte,
+                      'max_dte': max_dte, 'max_expiries': max_expiries, 'workers': workers,
+                      'cache_dir': dt._cache.directory if dt._cache is not None else None},
+        'tickers': per_ticker,
+        'rows': {'greeks': len(greeks), 'fits': len(fits)},
+        'stages': timings,
+        'total_seconds': round(sum(timings.values()), 6),
+        'outputs': outputs,
+    }
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('tickers', nargs='+')
+    parser.add_argument('--expiries', nargs='*', help='Expiration dates to fit (YYYY-MM-DD); all by default')
+    parser.add_argument('--min-dte', type=float, help='Skip expiries fewer than this many days out')
+    parser.add_argument('--max-dte', type=float, help='Skip expiries more than this many days out')
+    parser.add_argument('--max-expiries', type=int, help='Nearest N expiries per ticker after the other filters')
+    parser.add_argument('--workers', type=int, help='Calibration processes; 1 runs in-process')
+    parser.add_argument('--cache-dir', help='SnapshotCache directory; defaults to $OPTIONS_CACHE_DIR')
+    parser.add_argument('--cache-ttl', type=float, default=300, help='Seconds a cached snapshot stays fresh')
+    parser.add_argument('--offline', action='store_true', help='Serve only cached snapshots, never fetch')
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Also write the span summary to out-dir/profile.csv and a Chrome trace to out-dir/trace.json')
+    args = parser.parse_args(argv)
+
+    if args.cache_dir:
+        dt.configure_cache(os.path.expanduser(args.cache_dir), ttl=args.cache_ttl, offline=args.offline)
+    elif args.offline:
+        if dt._cache is None:
+            parser.error('--offline needs --cache-dir or OPTIONS_CACHE_DIR')
+        dt._cache.offline = True
+    if args.profile:
+        profiling.enable()
+
+    summary = run(args.tickers, args.out_dir, args.expiries, args.min_dte, args.max_dte, args.max_expiries,
+                  args.workers)
+    if args.profile:
+        table = profiling.report(os.path.join(args.out_dir, 'trace.json'))
+        table.to_csv(os.path.join(args.out_dir, 'profile.csv'), index_label='span')
+        summary['outputs'].update(profile=os.path.join(args.out_dir, 'profile.csv'),
+                                  trace=os.path.join(args.out_dir, 'trace.json'))
+        with open(os.path.join(args.out_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(table.to_string(float_format=lambda v: f"{v:.4g}"))
+
+    for ticker, stats in summary['tickers'].items():
+        print(f"{ticker:<8} spot {stats['spot']:10.2f}  {stats['expiries']:3d} expiries  "
+              f"{stats['fitted']:3d} fitted  {stats['failed']:3d} failed")
+    for stage, seconds in summary['stages'].items():
+        print(f"{stage:<10} {seconds * 1e3:10.1f} ms")
+    print(f"Wrote {', '.join(summary['outputs'].values())}")
+    return 0 if summary['rows']['fits'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,30 +1,233 @@
 import pandas as pd
-import yfinance as yf
 import datetime
-import math 
 import numpy as np
+import time
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from chain import is_call_symbol
+from profiling import profiled
 
 
+def _yfinance():
+    # Imported on the first fetch; yfinance is slow to import and offline runs never need it
+    import yfinance
+    return yfinance
 
-def options_chain(ticker: str) -> pd.DataFrame:
-    data = yf.Ticker(ticker)
-    expirations = data.options
 
-    options_list = []
+class SnapshotCache:
+    """
+    On-disk cache of option chain snapshots and market scalars.
+
+    Each chain is stored as one Parquet (or Feather) file per ticker and fetch
+    time. Fresh snapshots younger than `ttl` seconds are served instead of
+    refetching; in `offline` mode nothing is fetched and the latest snapshot at
+    or before `replay_time` is served regardless of age. Chain files are evicted
+    least recently used first once the directory exceeds `max_bytes`.
+
+    Scalars keep a history of (fetch time, value). Offline, the entry fetched
+    closest to the served snapshot of the ticker (or to `replay_time`) is used,
+    so replayed chains are priced with the spot and rate of their own time.
+    """
+
+    _STAMP = '%Y%m%dT%H%M%S%f'
+    MAX_VALUES = 4096  # history entries kept per scalar
+
+    def __init__(self, directory: str, ttl: float = 300, max_bytes: int = 512 * 2**20, offline: bool = False,
+                 replay_time: datetime.datetime = None, fmt: str = 'parquet'):
+        if fmt not in ('parquet', 'feather'):
+            raise ValueError("fmt must be 'parquet' or 'feather'")
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.replay_time = replay_time
+        self.fmt = fmt
+        self.served = {}  # ticker -> fetch time of the snapshot last served from the cache
+        os.makedirs(directory, exist_ok=True)
+
+    def snapshots(self, ticker: str) -> list:
+        """
+        All cached snapshots for a ticker as (fetch time, path), oldest first.
+        """
+        prefix = f"{ticker}__"
+        found = []
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if stem.startswith(prefix) and ext == f".{self.fmt}":
+                stamp = datetime.datetime.strptime(stem[len(prefix):], self._STAMP)
+                found.append((stamp, os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def read(self, path: str) -> pd.DataFrame:
+        os.utime(path)  # mark as recently used for LRU eviction
+        return pd.read_parquet(path) if self.fmt == 'parquet' else pd.read_feather(path)
+
+    def load_chain(self, ticker: str):
+        """
+        The snapshot to serve for a ticker, or None if it has to be fetched.
+
+        Returns
+        -------
+        tuple or None
+            (raw chain DataFrame, fetch time)
+        """
+        snapshots = self.snapshots(ticker)
+        if self.offline:
+            if self.replay_time is not None:
+                snapshots = [snap for snap in snapshots if snap[0] <= self.replay_time]
+            if not snapshots:
+                raise LookupError(f"No cached snapshot for {ticker} in offline mode")
+        elif not snapshots or (datetime.datetime.now() - snapshots[-1][0]).total_seconds() > self.ttl:
+            return None
+        stamp, path = snapshots[-1]
+        self.served[ticker] = stamp
+        return self.read(path), stamp
+
+    def store_chain(self, ticker: str, options: pd.DataFrame, stamp: datetime.datetime = None) -> str:
+        stamp = stamp if stamp is not None else datetime.datetime.now()
+        path = os.path.join(self.directory, f"{ticker}__{stamp.strftime(self._STAMP)}.{self.fmt}")
+        options = options.reset_index(drop=True)
+        # Written under a temporary name and renamed, so readers never see a partial file
+        partial = f"{path}.{os.getpid()}.tmp"
+        if self.fmt == 'parquet':
+            options.to_parquet(partial, index=False)
+        else:
+            options.to_feather(partial)
+        os.replace(partial, path)
+        self._evict()
+        return path
+
+    def _read_values(self, path: str) -> dict:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            values = json.load(f)
+        # Older caches kept a single [stamp, value] per name
+        return {name: [entries] if entries and not isinstance(entries[0], list) else entries
+                for name, entries in values.items()}
+
+    def value(self, name: str, fetch, at: datetime.datetime = None):
+        """
+        A cached scalar (spot price, rate, ...), calling `fetch()` when it is missing or stale.
+
+        Offline, the entry fetched closest to `at` is served; `at` defaults to
+        `replay_time`, and the latest entry is served when neither is set.
+        """
+        path = os.path.join(self.directory, 'values.json')
+        history = self._read_values(path).get(name, [])
+
+        if self.offline:
+            if not history:
+                raise LookupError(f"No cached value for {name} in offline mode")
+            at = at if at is not None else self.replay_time
+            if at is None:
+                return history[-1][1]
+            target = at.timestamp()
+            return min(history, key=lambda entry: abs(entry[0] - target))[1]
+        if history and time.time() - history[-1][0] <= self.ttl:
+            return history[-1][1]
+
+        value = fetch()
+        # Re-read right before writing so entries stored meanwhile by other processes are kept
+        values = self._read_values(path)
+        values[name] = sorted(values.get(name, []) + [[time.time(), float(value)]])[-self.MAX_VALUES:]
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, 'w') as f:
+            json.dump(values, f)
+        os.replace(partial, path)
+        return value
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(f".{self.fmt}"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+_cache = None
+
+
+def configure_cache(directory: str = None, **kwargs) -> SnapshotCache:
+    """
+    Route options_chain, spot_price and risk_free_rate through a SnapshotCache.
+
+    Keyword arguments are passed to SnapshotCache. Calling with no directory
+    turns caching off. The OPTIONS_CACHE_DIR environment variable enables the
+    cache at import time, so existing scripts pick it up without changes.
+    """
+    global _cache
+    _cache = SnapshotCache(directory, **kwargs) if directory is not None else None
+    return _cache
 
-    for exp in expirations:
-        option_chain = data.option_chain(exp)
-        combined = pd.concat([option_chain.calls, option_chain.puts], ignore_index=True)
-        combined['expirationDate'] = pd.to_datetime(exp)
-        options_list.append(combined)
 
-    options = pd.concat(options_list, ignore_index=True)
+if os.environ.get('OPTIONS_CACHE_DIR'):
+    configure_cache(os.environ['OPTIONS_CACHE_DIR'],
+                    ttl=float(os.environ.get('OPTIONS_CACHE_TTL', 300)),
+                    offline=os.environ.get('OPTIONS_CACHE_OFFLINE', '') == '1')
+
+class YahooTransport:
+    """
+    Fetches expirations and option chains from Yahoo Finance.
+    """
+
+    def expirations(self, ticker: str) -> tuple:
+        return _yfinance().Ticker(ticker).options
+
+    def option_chain(self, ticker: str, exp: str):
+        chain = _yfinance().Ticker(ticker).option_chain(exp)
+        return chain.calls, chain.puts
+
+
+class StaticTransport:
+    """
+    Serves canned chains for offline use and tests.
+
+    `chains` maps ticker -> {expiration string: (calls DataFrame, puts DataFrame)}.
+    """
+
+    def __init__(self, chains: dict):
+        self.chains = chains
+
+    def expirations(self, ticker: str) -> tuple:
+        return tuple(self.chains[ticker])
+
+    def option_chain(self, ticker: str, exp: str):
+        calls, puts = self.chains[ticker][exp]
+        return calls.copy(), puts.copy()
+
+
+def _with_retry(fetch, retries: int, backoff: float):
+    # Retry a network call, sleeping backoff, 2*backoff, 4*backoff, ... between attempts
+    for attempt in range(retries + 1):
+        try:
+            return fetch()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2**attempt)
+
+
+def postprocess_chain(options: pd.DataFrame, now: datetime.datetime = None) -> pd.DataFrame:
+    """
+    Add dte, Call and mid to a raw concatenated chain and drop unused columns.
+
+    `now` is the time DTE is measured from, e.g. the fetch time of a cached snapshot.
+    """
+    now = now if now is not None else datetime.datetime.now()
 
     # Days To Expiration (DTE) in years
-    options['dte'] = (options['expirationDate'] - datetime.datetime.now()).dt.days / 365
+    options['dte'] = (options['expirationDate'] - now).dt.days / 365
 
     # True if call
-    options['Call'] = options['contractSymbol'].str[4:].apply(lambda x: "C" in x)
+    options['Call'] = is_call_symbol(options['contractSymbol'])
 
     # Ensure numeric columns
     options[['bid', 'ask', 'strike']] = options[['bid', 'ask', 'strike']].apply(pd.to_numeric)
@@ -39,15 +242,165 @@ def options_chain(ticker: str) -> pd.DataFrame:
 
     return options
 
-def risk_free_rate():
-    shy = yf.Ticker('SHY')
+
+@profiled('options_chains', rows=len)
+def options_chains(tickers, max_workers: int = 8, retries: int = 3, backoff: float = 0.5,
+                   transport=None) -> pd.DataFrame:
+    """
+    Fetch every expiration of every ticker concurrently.
+
+    Parameters
+    ----------
+    tickers : list of str
+        Yahoo Finance ticker symbols.
+    max_workers : int, optional
+        Maximum number of requests in flight at once.
+    retries : int, optional
+        Extra attempts per request after a failure.
+    backoff : float, optional
+        Seconds to wait before the first retry, doubling after each failure.
+    transport : object, optional
+        Provides expirations(ticker) and option_chain(ticker, exp); defaults to YahooTransport.
+
+    Returns
+    -------
+    pd.DataFrame
+        All chains with a 'ticker' column, ordered by ticker then expiration as
+        listed by the transport, regardless of completion order.
+    """
+    transport = transport if transport is not None else YahooTransport()
+
+    def fetch_chain(ticker, exp):
+        calls, puts = _with_retry(lambda: transport.option_chain(ticker, exp), retries, backoff)
+        combined = pd.concat([calls, puts], ignore_index=True)
+        combined['expirationDate'] = pd.to_datetime(exp)
+        combined['ticker'] = ticker
+        return combined
+
+    # Serve what the cache can; snapshots are replayed relative to their own fetch time
+    cached, now = {}, None
+    if _cache is not None:
+        for ticker in tickers:
+            hit = _cache.load_chain(ticker)
+            if hit is not None:
+                cached[ticker], stamp = hit
+                if _cache.offline:
+                    now = stamp if now is None else max(now, stamp)
+    missing = [ticker for ticker in tickers if ticker not in cached]
+
+    fetched = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            expirations = list(pool.map(lambda t: _with_retry(lambda: transport.expirations(t), retries, backoff),
+                                        missing))
+            pairs = [(ticker, exp) for ticker, exps in zip(missing, expirations) for exp in exps]
+            options_list = list(pool.map(lambda pair: fetch_chain(*pair), pairs))
+        for ticker in missing:
+            fetched[ticker] = pd.concat([o for (t, _), o in zip(pairs, options_list) if t == ticker],
+                                        ignore_index=True)
+            if _cache is not None:
+                _cache.store_chain(ticker, fetched[ticker])
+
+    options = pd.concat([cached[t] if t in cached else fetched[t] for t in tickers], ignore_index=True)
+    return postprocess_chain(options, now)
+
+
+@profiled('options_chain', rows=len)
+def options_chain(ticker: str, max_workers: int = 8, retries: int = 3, backoff: float = 0.5,
+                  transport=None) -> pd.DataFrame:
+    options = options_chains([ticker], max_workers=max_workers, retries=retries, backoff=backoff,
+                             transport=transport)
+    return options.drop(columns='ticker')
+
+def _fetch_risk_free_rate():
+    shy = _yfinance().Ticker('SHY')
     # 'yield' is typically the dividend yield of the ETF as a decimal (e.g., 0.015 = 1.5%)
     rate = shy.info.get('yield', None)
     if rate is None:
         raise ValueError("Yield data not available from SHY ticker")
     return rate
 
-def forward_price(ticker: str, T: float, q: float = 0.0) -> float:
+@profiled('risk_free_rate')
+def risk_free_rate():
+    if _cache is not None:
+        # Replays use the rate of the most recent snapshot served, the time their DTEs are measured from
+        at = max(_cache.served.values()) if _cache.served else None
+        return _cache.value('SHY:yield', _fetch_risk_free_rate, at=at)
+    return _fetch_risk_free_rate()
+
+@profiled('spot_price')
+def spot_price(ticker: str) -> float:
+    """
+    Latest close of the underlying, served from the snapshot cache when one is configured.
+    """
+    fetch = lambda: _yfinance().Ticker(ticker).history(period='1d')['Close'].iloc[-1]
+    if _cache is not None:
+        return _cache.value(f"{ticker}:spot", fetch, at=_cache.served.get(ticker))
+    return fetch()
+
+class MarketContext:
+    """
+    Spot and risk-free rate for one underlying, fetched once per snapshot.
+
+    Both values are reused until they are older than `ttl` seconds, so pricing
+    every expiry of a chain costs one spot and one rate lookup in total.
+    """
+
+    def __init__(self, ticker: str, ttl: float = 60.0):
+        self.ticker = ticker
+        self.ttl = ttl
+        self._spot = None
+        self._r = None
+        self._stamp = None
+
+    def refresh(self):
+        self._spot = spot_price(self.ticker)
+        self._r = risk_free_rate()
+        self._stamp = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._stamp is None or time.monotonic() - self._stamp > self.ttl:
+            self.refresh()
+
+    @property
+    def spot(self) -> float:
+        self._ensure_fresh()
+        return self._spot
+
+    @property
+    def r(self) -> float:
+        self._ensure_fresh()
+        return self._r
+
+    def forward(self, T, q: float = 0.0):
+        """
+        Forward price F = S * exp((r - q) * T) for a scalar or an array of T.
+        """
+        self._ensure_fresh()
+        F = self._spot * np.exp((self._r - q) * np.asarray(T, dtype=float))
+        return float(F) if F.ndim == 0 else F
+
+
+_contexts = {}
+
+
+def market_context(ticker: str, ttl: float = None) -> MarketContext:
+    """
+    The shared MarketContext for a ticker, created on first use.
+
+    A `ttl` given here applies to the shared context from now on, even if it
+    already existed; without one a new context uses 60 seconds and an existing
+    one keeps its setting.
+    """
+    if ticker not in _contexts:
+        _contexts[ticker] = MarketContext(ticker, ttl if ttl is not None else 60.0)
+    elif ttl is not None:
+        _contexts[ticker].ttl = ttl
+    return _contexts[ticker]
+
+
+@profiled('forward_price', rows=np.size)
+def forward_price(ticker: str, T, q: float = 0.0, context: MarketContext = None):
     """
     Calculate forward price F = S * exp((r - q) * T)
 
@@ -55,22 +408,41 @@ def forward_price(ticker: str, T: float, q: float = 0.0) -> float:
     ----------
     ticker : str
         Yahoo Finance ticker symbol.
-    T : float
-        Time to expiration in years.
+    T : float or array-like
+        Time to expiration in years, one per expiry.
     q : float, optional
         Dividend yield, default is 0.
+    context : MarketContext, optional
+        Source of spot and rate; defaults to the shared context for the ticker.
 
     Returns
     -------
-    F : float
-        Forward price
+    F : float or ndarray
+        Forward price, with the same shape as T
+    """
+    context = context if context is not None else market_context(ticker)
+    return context.forward(T, q)
+
+def implied_spot(options: pd.DataFrame, r: float) -> float:
     """
-    data = yf.Ticker(ticker)
-    spot = data.history(period='1d')['Close'].iloc[-1]
-    r = risk_free_rate()
-    F = spot * math.exp((r - q) * T)
-    return F
+    Spot implied by put-call parity, for snapshots that carry no spot price.
+
+    For each expiry the strike where call and put mids are closest gives
+    S = C - P + K * exp(-r * T); the median over expiries is returned.
+    """
+    calls = options[options['Call']][['expirationDate', 'strike', 'dte', 'mid']]
+    puts = options[~options['Call']][['expirationDate', 'strike', 'mid']]
+    pairs = calls.merge(puts, on=['expirationDate', 'strike'], suffixes=('_call', '_put'))
+    pairs = pairs[(pairs['dte'] > 0) & pairs['mid_call'].notna() & pairs['mid_put'].notna()]
+    if pairs.empty:
+        raise ValueError("No call/put pairs to infer spot from")
+
+    pairs['gap'] = (pairs['mid_call'] - pairs['mid_put']).abs()
+    atm = pairs.loc[pairs.groupby('expirationDate')['gap'].idxmin()]
+    spots = atm['mid_call'] - atm['mid_put'] + atm['strike'] * np.exp(-r * atm['dte'])
+    return float(np.median(spots))
 
+@profiled('moneyness_array', rows=len)
 def moneyness_array(options: pd.DataFrame, F: float ) -> np.ndarray:
     """
     Compute moneyness for each option in options_df.
@@ -84,32 +456,13 @@ def moneyness_array(options: pd.DataFrame, F: float ) -> np.ndarray:
 
 
 if __name__ == '__main__':
-    ticker = "AAPL"
+    import sys
+    ticker = sys.argv[1] if len(sys.argv) > 1 else "AAPL"
 
-    # Get options data
+    # Forward price of every listed expiration, one T per expiry
     options = options_chain(ticker)
-
-    # List available expirations
-    expirations = options['expirationDate'].unique()
-    print("Available expirations:")
-    for i, exp in enumerate(expirations):
-        print(f"{i}: {exp.date()}")
-
-    # Ask user to pick an expiration by index
-    while True:
-        try:
-            idx = int(input("Select expiration by index: "))
-            selected_exp = expirations[idx]
-            break
-        except (IndexError, ValueError):
-            print("Invalid index. Try again.")
-
-    # Filter options for that expiration
-    options_for_exp = options[options['expirationDate'] == selected_exp]
-
-    # Get T (time to expiration) from any row in this expiration
-    T = options_for_exp['dte'].iloc[0]
-
-    # Calculate forward price
-    F = forward_price(ticker, T)
-    print(f"Forward price for expiration {selected_exp.date()}: {F:.2f}")
+    expiries = options.groupby('expirationDate', sort=True)['dte'].first()
+    expiries = expiries[expiries > 0]
+    forwards = forward_price(ticker, expiries.to_numpy(dtype=float))
+    for exp, F in zip(expiries.index, forwards):
+        print(f"Forward price for expiration {exp.date()}: {F:.2f}")
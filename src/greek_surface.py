@@ -0,0 +1,157 @@
+import json
+import numpy as np
+import pandas as pd
+from greeks import VectorGreeks
+
+
+class GreekSurface:
+    """
+    All eight Greeks precomputed on a (log-moneyness x T) grid.
+
+    Log-moneyness is log(K / spot). Delta, theta and rho are stored separately
+    for calls and puts; the other Greeks are the same for both. Lookups at
+    arbitrary (K, T) interpolate bilinearly (or bicubically) from the grid, and
+    the grid can be saved as a .npy file that other processes memory-map.
+    """
+
+    GREEKS = ('delta', 'gamma', 'vega', 'theta', 'rho', 'vomma', 'vanna', 'charm')
+    SIDED = ('delta', 'theta', 'rho')
+    LAYERS = ('delta_call', 'delta_put', 'gamma', 'vega', 'theta_call', 'theta_put', 'rho_call', 'rho_put',
+              'vomma', 'vanna', 'charm')
+
+    def __init__(self, values: np.ndarray, k_grid: np.ndarray, t_grid: np.ndarray, spot: float, r: float):
+        self.values = values  # (len(LAYERS), len(k_grid), len(t_grid))
+        self.k_grid = k_grid
+        self.t_grid = t_grid
+        self.spot = spot
+        self.r = r
+        self._cubic = {}
+
+    @classmethod
+    def build(cls, spot: float, r: float, k_grid, t_grid, sigma) -> 'GreekSurface':
+        """
+        Evaluate every Greek on the grid in one vectorized pass per option type.
+
+        Args:
+            spot (float): Spot price
+            r (float): Risk-free rate
+            k_grid (array-like): Ascending log-moneyness points
+            t_grid (array-like): Ascending times to expiry in years
+            sigma (float, ndarray or callable): Volatility, either a constant, a
+                (len(k_grid), len(t_grid)) array or a function sigma(k, T) on the mesh
+
+        Returns:
+            GreekSurface
+        """
+        k_grid = np.asarray(k_grid, dtype=np.float64)
+        t_grid = np.asarray(t_grid, dtype=np.float64)
+        k, T = np.meshgrid(k_grid, t_grid, indexing='ij')
+        sigma = sigma(k, T) if callable(sigma) else np.broadcast_to(np.asarray(sigma, dtype=np.float64), k.shape)
+
+        g = VectorGreeks(S=spot, T=T, K=spot * np.exp(k), r=r, sigma=sigma)
+        calls = g.all_greeks(True)
+        puts = g.all_greeks(False)
+        layers = []
+        for name in cls.LAYERS:
+            greek, _, side = name.partition('_')
+            layers.append(puts[greek] if side == 'put' else calls[greek])
+        return cls(np.stack(layers), k_grid, t_grid, spot, r)
+
+    @classmethod
+    def from_greeks_df(cls, greeks_df: pd.DataFrame, spot: float, r: float, n_k: int = 101, n_t: int = 60,
+                       k_range=(-0.5, 0.5)) -> 'GreekSurface':
+        """
+        Build over the span of a chain, using its IVs interpolated onto the grid.
+
+        A chain with a single expiry gives a grid that is flat in T over a day either side of it.
+        """
+        from scipy.interpolate import griddata
+
+        k_obs = np.log(greeks_df['strike'].to_numpy(dtype=float) / spot)
+        t_obs = greeks_df['dte'].to_numpy(dtype=float)
+        iv_obs = greeks_df['iv'].to_numpy(dtype=float)
+        k_grid = np.linspace(*k_range, n_k)
+        if t_obs.min() == t_obs.max():
+            # A single expiry has no extent in T for griddata to triangulate: interpolate the
+            # smile in k and hold it flat over a day either side of that expiry
+            t0 = t_obs[0]
+            t_grid = np.linspace(max(t0 - 1 / 365, t0 / 2), t0 + 1 / 365, n_t)
+            k_unique, inverse = np.unique(k_obs, return_inverse=True)
+            iv_unique = np.bincount(inverse, iv_obs) / np.bincount(inverse)
+            smile = np.interp(k_grid, k_unique, iv_unique)
+            return cls.build(spot, r, k_grid, t_grid, np.repeat(smile[:, None], n_t, axis=1))
+        t_grid = np.linspace(t_obs.min(), t_obs.max(), n_t)
+
+        k, T = np.meshgrid(k_grid, t_grid, indexing='ij')
+        points = np.column_stack([k_obs, t_obs])
+        sigma = griddata(points, iv_obs, (k, T), method='linear')
+        # Outside the convex hull of the quotes fall back to the nearest quote
+        outside = np.isnan(sigma)
+        sigma[outside] = griddata(points, iv_obs, (k[outside], T[outside]), method='nearest')
+        return cls.build(spot, r, k_grid, t_grid, sigma)
+
+    def layer(self, greek: str, call: bool = True) -> int:
+        name = f"{greek}_{'call' if call else 'put'}" if greek in self.SIDED else greek
+        return self.LAYERS.index(name)
+
+    def lookup(self, greek: str, K, T, call: bool = True, method: str = 'linear') -> np.ndarray:
+        """
+        Interpolated Greek at arbitrary strikes and expiries.
+
+        Queries outside the grid are clamped to its edges.
+
+        Args:
+            greek (str): 'delta', 'gamma', 'vega', 'theta', 'rho', 'vomma', 'vanna' or 'charm'
+            K (array-like): Strikes
+            T (array-like): Times to expiry in years, broadcast against K
+            call (bool): Option type for delta, theta and rho
+            method (str): 'linear' (bilinear) or 'cubic'
+
+        Returns:
+            ndarray: Greek values with the broadcast shape of K and T
+        """
+        grid = self.values[self.layer(greek, call)]
+        k, T = np.broadcast_arrays(np.log(np.asarray(K, dtype=np.float64) / self.spot),
+                                   np.asarray(T, dtype=np.float64))
+        k = np.clip(k, self.k_grid[0], self.k_grid[-1])
+        T = np.clip(T, self.t_grid[0], self.t_grid[-1])
+
+        if method == 'cubic':
+            key = (greek, call)
+            if key not in self._cubic:
+                from scipy.interpolate import RegularGridInterpolator
+                self._cubic[key] = RegularGridInterpolator((self.k_grid, self.t_grid), np.asarray(grid),
+                                                           method='cubic')
+            return self._cubic[key](np.stack([k, T], axis=-1))
+        if method != 'linear':
+            raise ValueError("method must be 'linear' or 'cubic'")
+
+        i = np.clip(np.searchsorted(self.k_grid, k, side='right') - 1, 0, len(self.k_grid) - 2)
+        j = np.clip(np.searchsorted(self.t_grid, T, side='right') - 1, 0, len(self.t_grid) - 2)
+        wk = (k - self.k_grid[i]) / (self.k_grid[i + 1] - self.k_grid[i])
+        wt = (T - self.t_grid[j]) / (self.t_grid[j + 1] - self.t_grid[j])
+        return ((1 - wk) * (1 - wt) * grid[i, j] + wk * (1 - wt) * grid[i + 1, j]
+                + (1 - wk) * wt * grid[i, j + 1] + wk * wt * grid[i + 1, j + 1])
+
+    def save(self, path: str):
+        """
+        Write the grid to `path` (.npy) and its axes and market inputs to `path`.json.
+        """
+        path = path if path.endswith('.npy') else f"{path}.npy"
+        np.save(path, self.values)
+        with open(f"{path}.json", 'w') as f:
+            json.dump({'k_grid': self.k_grid.tolist(), 't_grid': self.t_grid.tolist(),
+                       'spot': self.spot, 'r': self.r, 'layers': list(self.LAYERS)}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'GreekSurface':
+        """
+        Load a saved surface; with `mmap` the grid is memory-mapped read-only and shared between processes.
+        """
+        path = path if path.endswith('.npy') else f"{path}.npy"
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        if meta['layers'] != list(cls.LAYERS):
+            raise ValueError("Saved surface has a different layer layout")
+        values = np.load(path, mmap_mode='r' if mmap else None)
+        return cls(values, np.array(meta['k_grid']), np.array(meta['t_grid']), meta['spot'], meta['r'])
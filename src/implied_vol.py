@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from greeks import VectorGreeks
+
+SIGMA_MIN = 1e-6
+SIGMA_MAX = 10.0
+
+
+def _initial_guess(price, S, T, K, r, is_call):
+    """
+    Corrado-Miller rational approximation, which reduces to Brenner-Subrahmanyam
+    (sigma = sqrt(2 pi / T) * C / S) at the money.
+    """
+    X = K * np.exp(-r * T)
+    call = np.where(is_call, price, price + S - X)  # put-call parity
+    half_gap = call - (S - X) / 2
+    root = np.sqrt(np.maximum(half_gap**2 - (S - X)**2 / np.pi, 0.0))
+    guess = np.sqrt(2 * np.pi / T) / (S + X) * (half_gap + root)
+    return np.clip(np.nan_to_num(guess, nan=0.2), 1e-3, 5.0)
+
+
+def _price_vega_vomma(S, T, K, r, sigma, is_call):
+    g = VectorGreeks(S=S, T=T, K=K, r=r, sigma=sigma)
+    call, put = g.price()
+    vega = S * g.pdf_d1 * g.sqrt_T
+    vomma = vega * g.d1 * g.d2 / sigma
+    return np.where(is_call, call, put), vega, vomma
+
+
+def implied_volatility(price, S, T, K, r, is_call, tol: float = 1e-10, sigma_tol: float = 1e-8,
+                       max_halley: int = 8, max_bisect: int = 100):
+    """
+    Invert Black-Scholes for a whole chain at once.
+
+    Starts from a rational initial guess, takes a few vectorized Halley steps
+    (using vega and vomma) inside a bracket that is tightened on every step,
+    then finishes any points that have not converged by bisection.
+
+    Parameters
+    ----------
+    price : array-like
+        Option prices (e.g. mids).
+    S, T, K, r : array-like
+        Spot, time to expiry in years, strike and risk-free rate, broadcast together.
+    is_call : array-like of bool
+        True for calls, False for puts.
+    tol : float, optional
+        Absolute price tolerance.
+    sigma_tol : float, optional
+        Volatility tolerance. A point has converged once its price error is within
+        `tol` and its volatility error (price error / vega, or the bracket width)
+        is within `sigma_tol`, so tiny wing prices are not accepted at any vol.
+
+    Returns
+    -------
+    tuple
+        (implied volatilities, converged flags). Points with prices outside the
+        no-arbitrage bounds, or whose root lies outside [SIGMA_MIN, SIGMA_MAX],
+        are NaN and flagged as not converged.
+    """
+    price, S, T, K, r, is_call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (price, S, T, K, r)), np.asarray(is_call, dtype=bool))
+    price, S, T, K, r, is_call = (a.ravel() for a in (price, S, T, K, r, is_call))
+
+    with np.errstate(invalid='ignore'):
+        X = K * np.exp(-r * T)
+        lower = np.where(is_call, np.maximum(S - X, 0.0), np.maximum(X - S, 0.0))
+        upper = np.where(is_call, S, X)
+        solvable = (S > 0) & (K > 0) & (T > 0) & (price > lower) & (price < upper)
+
+    sigma = np.full(price.shape, np.nan)
+    converged = np.zeros(price.shape, dtype=bool)
+    idx = np.flatnonzero(solvable)
+    lo = np.full(idx.size, SIGMA_MIN)
+    hi = np.full(idx.size, SIGMA_MAX)
+    s = _initial_guess(price[idx], S[idx], T[idx], K[idx], r[idx], is_call[idx])
+
+    args = lambda j: (S[idx][j], T[idx][j], K[idx][j], r[idx][j])
+    active = np.arange(idx.size)
+    for _ in range(max_halley):
+        if active.size == 0:
+            break
+        model, vega, vomma = _price_vega_vomma(*args(active), s[active], is_call[idx][active])
+        diff = model - price[idx][active]
+
+        done = (np.abs(diff) < tol) & (np.abs(diff) < sigma_tol * vega)
+        converged[idx[active[done]]] = True
+        # Price is increasing in sigma, so the sign of the error tightens the bracket
+        hi[active] = np.where(diff > 0, s[active], hi[active])
+        lo[active] = np.where(diff < 0, s[active], lo[active])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = diff / vega
+            step = newton / (1 - 0.5 * newton * vomma / vega)
+        proposal = s[active] - step
+        inside = np.isfinite(proposal) & (proposal > lo[active]) & (proposal < hi[active])
+        s[active] = np.where(done, s[active], np.where(inside, proposal, 0.5 * (lo[active] + hi[active])))
+        active = active[~done]
+
+    # Bisection fallback for whatever Halley could not finish
+    for _ in range(max_bisect):
+        if active.size == 0:
+            break
+        model, vega, _ = _price_vega_vomma(*args(active), s[active], is_call[idx][active])
+        diff = model - price[idx][active]
+        fitted = (np.abs(diff) < tol) & (np.abs(diff) < sigma_tol * vega)
+        collapsed = ~fitted & (hi[active] - lo[active] < sigma_tol)
+        # A bracket that closed onto SIGMA_MIN or SIGMA_MAX means the root lies outside them
+        clamped = collapsed & ((lo[active] <= SIGMA_MIN) | (hi[active] >= SIGMA_MAX))
+        done = fitted | (collapsed & ~clamped)
+        converged[idx[active[done]]] = True
+        s[active[clamped]] = np.nan
+        hi[active] = np.where(diff > 0, s[active], hi[active])
+        lo[active] = np.where(diff < 0, s[active], lo[active])
+        active = active[~(done | clamped)]
+        s[active] = 0.5 * (lo[active] + hi[active])
+
+    sigma[idx] = s
+    return sigma, converged
+
+
+def chain_implied_vols(options: pd.DataFrame, F, r: float, price_col: str = 'mid'):
+    """
+    Implied volatilities for an options_chain frame from its mid prices and forwards.
+
+    F is the forward for each row (or a single forward); with no dividends the
+    matching spot is F * exp(-r * T).
+
+    Returns
+    -------
+    tuple
+        (implied volatilities, converged flags) aligned with the rows of `options`
+    """
+    T = options['dte'].to_numpy(dtype=float)
+    S = np.asarray(F, dtype=float) * np.exp(-r * T)
+    return implied_volatility(options[price_col].to_numpy(dtype=float), S, T,
+                              options['strike'].to_numpy(dtype=float), r, options['Call'].to_numpy(dtype=bool))
+
+
+"""
+CHECKER
+
+if __name__ == '__main__':
+    import time
+    from scipy.optimize import brentq
+    from black_scholes import BlackScholes
+
+    rng = np.random.default_rng(0)
+    n = 10_000
+    S, r = 100.0, 0.03
+    T = rng.uniform(0.02, 2, n)
+    K = rng.uniform(60, 140, n)
+    sigma = rng.uniform(0.05, 1.0, n)
+    is_call = rng.random(n) < 0.5
+    price = VectorGreeks(S, T, K, r, sigma).option_price(is_call)
+
+    start = time.perf_counter()
+    iv, ok = implied_volatility(price, S, T, K, r, is_call)
+    print(f"Vectorized: {time.perf_counter() - start:.4f}s, converged {ok.mean():.2%}, "
+          f"max error {np.nanmax(np.abs(iv - sigma)[ok]):.2e}")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        f = lambda v: BlackScholes(S, T[i], K[i], r, v).price()[0 if is_call[i] else 1] - price[i]
+        brentq(f, 1e-6, 10)
+    print(f"brentq loop (1k of {n}): {time.perf_counter() - start:.4f}s")
+
+"""
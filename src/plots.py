@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 
 
@@ -14,6 +12,8 @@ def plot_greek_DTE(df, greek):
     Returns:
         None. Displays matplotlib plot.
     """
+    import matplotlib.pyplot as plt
+
     strikes = df['strike'].unique()
     
     plt.figure(figsize=(10, 6))
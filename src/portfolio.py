@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+
+class Portfolio:
+    """
+    Book-level dollar Greeks aggregated by underlying, expiry bucket and strike bucket.
+
+    Per-contract Greeks are cached in flat arrays with a dict from contractSymbol
+    to row, so positions are joined with hash lookups. Aggregates live in one
+    (underlying, expiry bucket, strike bucket, Greek) array built with bincount
+    group sums; changing a position adds just that contract's difference.
+
+    Dollar Greeks per position (qty x multiplier):
+        delta: delta * S            (dollars per $1 of spot)
+        gamma: gamma * S**2 / 100   (change in dollar delta per 1% spot move)
+        vega:  vega / 100           (dollars per vol point)
+        theta: theta                (dollars per day)
+    """
+
+    GREEKS = ('delta', 'gamma', 'vega', 'theta')
+    EXPIRY_EDGES = (0, 7, 30, 90, 180, 365, np.inf)               # days
+    STRIKE_EDGES = (0, 0.8, 0.9, 0.95, 1.0, 1.05, 1.1, 1.2, np.inf)  # strike / spot
+
+    def __init__(self, multiplier: float = 100, expiry_edges=EXPIRY_EDGES, strike_edges=STRIKE_EDGES):
+        self.multiplier = multiplier
+        self.expiry_edges = np.asarray(expiry_edges, dtype=np.float64)
+        self.strike_edges = np.asarray(strike_edges, dtype=np.float64)
+        self.underlyings = []
+        self._underlying_code = {}
+        self._row = {}
+        self.symbols = np.empty(0, dtype=object)
+        self.group = np.empty(0, dtype=np.int64)
+        self.contrib = np.empty((0, len(self.GREEKS)))
+        self.qty = np.empty(0)
+        self.totals = np.zeros((0, len(self.expiry_edges) - 1, len(self.strike_edges) - 1, len(self.GREEKS)))
+
+    @property
+    def _n_groups(self) -> int:
+        return int(np.prod(self.totals.shape[:3]))
+
+    def _group_ids(self, code: int, dte, strike, spot: float) -> np.ndarray:
+        n_exp, n_strike = len(self.expiry_edges) - 1, len(self.strike_edges) - 1
+        e = np.clip(np.searchsorted(self.expiry_edges, dte * 365, side='right') - 1, 0, n_exp - 1)
+        s = np.clip(np.searchsorted(self.strike_edges, strike / spot, side='right') - 1, 0, n_strike - 1)
+        return (code * n_exp + e) * n_strike + s
+
+    def _accumulate(self, rows, qty):
+        # Group sums of qty x per-contract dollar Greeks, one bincount per Greek
+        flat = self.totals.reshape(-1, len(self.GREEKS))
+        for j in range(len(self.GREEKS)):
+            flat[:, j] += np.bincount(self.group[rows], weights=qty * self.contrib[rows, j],
+                                      minlength=self._n_groups)
+
+    def add_greeks(self, ticker: str, greeks_df: pd.DataFrame, spot: float):
+        """
+        Cache or refresh per-contract Greeks for one underlying (e.g. OptionAnalysis.greeks_df).
+
+        Contracts already held are re-aggregated with their new Greeks.
+        """
+        if ticker not in self._underlying_code:
+            self._underlying_code[ticker] = len(self.underlyings)
+            self.underlyings.append(ticker)
+            self.totals = np.concatenate([self.totals, np.zeros((1,) + self.totals.shape[1:])])
+        code = self._underlying_code[ticker]
+
+        symbols = greeks_df['contractSymbol'].to_numpy()
+        strike = greeks_df['strike'].to_numpy(dtype=np.float64)
+        contrib = self.multiplier * np.column_stack([
+            greeks_df['delta'].to_numpy(dtype=np.float64) * spot,
+            greeks_df['gamma'].to_numpy(dtype=np.float64) * spot**2 / 100,
+            greeks_df['vega'].to_numpy(dtype=np.float64) / 100,
+            greeks_df['theta'].to_numpy(dtype=np.float64),
+        ])
+        group = self._group_ids(code, greeks_df['dte'].to_numpy(dtype=np.float64), strike, spot)
+
+        rows = np.array([self._row.get(symbol, -1) for symbol in symbols], dtype=np.int64)
+        new = rows < 0
+        rows[new] = np.arange(len(self.symbols), len(self.symbols) + np.count_nonzero(new))
+        self._row.update(zip(symbols[new], rows[new].tolist()))
+        self.symbols = np.concatenate([self.symbols, symbols[new].astype(object)])
+        self.group = np.concatenate([self.group, np.zeros(np.count_nonzero(new), dtype=np.int64)])
+        self.contrib = np.concatenate([self.contrib, np.zeros((np.count_nonzero(new), len(self.GREEKS)))])
+        self.qty = np.concatenate([self.qty, np.zeros(np.count_nonzero(new))])
+
+        held = rows[self.qty[rows] != 0]
+        self._accumulate(held, -self.qty[held])
+        self.group[rows] = group
+        self.contrib[rows] = contrib
+        self._accumulate(held, self.qty[held])
+
+    def _rows(self, symbols) -> np.ndarray:
+        try:
+            return np.array([self._row[symbol] for symbol in symbols], dtype=np.int64)
+        except KeyError as err:
+            raise KeyError(f"No cached Greeks for contract {err.args[0]}") from None
+
+    def set_positions(self, positions: pd.DataFrame):
+        """
+        Replace the whole book with a (contractSymbol, qty) table and re-aggregate.
+        """
+        rows = self._rows(positions['contractSymbol'])
+        self.qty[:] = 0
+        np.add.at(self.qty, rows, positions['qty'].to_numpy(dtype=np.float64))
+        self.totals[:] = 0
+        held = np.flatnonzero(self.qty)
+        self._accumulate(held, self.qty[held])
+
+    def update_positions(self, changes: dict):
+        """
+        Set new quantities for some contracts, adjusting the aggregates by the difference only.
+        """
+        rows = self._rows(changes.keys())
+        new_qty = np.fromiter(changes.values(), dtype=np.float64, count=len(changes))
+        diff = new_qty - self.qty[rows]
+        self.qty[rows] = new_qty
+        flat = self.totals.reshape(-1, len(self.GREEKS))
+        np.add.at(flat, self.group[rows], diff[:, None] * self.contrib[rows])
+
+    def exposures(self, by=('underlying', 'expiry', 'strike')) -> pd.DataFrame:
+        """
+        Dollar Greeks summed over every dimension not listed in `by`.
+        """
+        dims = ('underlying', 'expiry', 'strike')
+        labels = {
+            'underlying': list(self.underlyings),
+            'expiry': [f"{lo:g}-{hi:g}d" for lo, hi in zip(self.expiry_edges[:-1], self.expiry_edges[1:])],
+            'strike': [f"{lo:g}-{hi:g}" for lo, hi in zip(self.strike_edges[:-1], self.strike_edges[1:])],
+        }
+        drop = tuple(i for i, dim in enumerate(dims) if dim not in by)
+        totals = self.totals.sum(axis=drop) if drop else self.totals
+        kept = [dim for dim in dims if dim in by]
+        if not kept:
+            return pd.DataFrame([totals], columns=list(self.GREEKS))
+        index = pd.MultiIndex.from_product([labels[dim] for dim in kept], names=kept)
+        return pd.DataFrame(totals.reshape(-1, len(self.GREEKS)), index=index, columns=list(self.GREEKS))
@@ -0,0 +1,216 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'rows', 'start', 'mem_start', 'mem_peak')
+
+    def __init__(self, profiler, name: str, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def add_rows(self, n: int):
+        self.rows = (self.rows or 0) + int(n)
+
+    def __enter__(self):
+        if self.profiler.memory and tracemalloc.is_tracing():
+            self.profiler._push_memory(self)
+        else:
+            self.mem_start = None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        allocated = self.profiler._pop_memory(self) if self.mem_start is not None else None
+        self.profiler._record(self.name, self.start, end, self.rows, allocated)
+        return False
+
+
+class _NullSpan:
+    """
+    Returned by span() while profiling is off: entering, exiting and counting rows do nothing.
+    """
+    __slots__ = ()
+
+    def add_rows(self, n: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """
+    Collects timed spans: call counts, wall time, rows processed and, optionally,
+    peak memory allocated inside each span.
+
+    Disabled by default. While disabled span() returns a shared no-op context
+    and profiled functions call straight through, so the only cost is one
+    attribute check per call. Spans may nest and may run on several threads;
+    memory tracking uses tracemalloc, which is process-wide, so per-span
+    allocations are only meaningful for spans on the main thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self._lock = threading.Lock()
+        self._memory_stack = []
+        self.reset()
+
+    def enable(self, memory: bool = False):
+        """
+        Start recording; with `memory`, also trace allocations (slows the profiled code noticeably).
+        """
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self.memory and getattr(self, '_started_tracing', False):
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.memory = False
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+            self._origin = time.perf_counter_ns()
+
+    def span(self, name: str, rows: int = None):
+        return _Span(self, name, rows) if self.enabled else _NULL_SPAN
+
+    def _push_memory(self, span: _Span):
+        # A parent's peak is carried over on the stack because each child resets tracemalloc's peak
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory_stack:
+            parent = self._memory_stack[-1]
+            parent.mem_peak = max(parent.mem_peak, peak)
+        tracemalloc.reset_peak()
+        span.mem_start = current
+        span.mem_peak = current
+        self._memory_stack.append(span)
+
+    def _pop_memory(self, span: _Span) -> int:
+        peak = max(span.mem_peak, tracemalloc.get_traced_memory()[1])
+        if self._memory_stack and self._memory_stack[-1] is span:
+            self._memory_stack.pop()
+        if self._memory_stack:
+            parent = self._memory_stack[-1]
+            parent.mem_peak = max(parent.mem_peak, peak)
+        return peak - span.mem_start
+
+    def _record(self, name: str, start: int, end: int, rows, allocated):
+        event = (name, start - self._origin, end - start, threading.get_ident(), rows, allocated)
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per span name: calls, total/mean wall time, rows, rows per second and peak allocation.
+
+        Nested spans are counted in full, so a parent's time includes its children.
+        """
+        columns = ['name', 'start_ns', 'duration_ns', 'thread', 'rows', 'allocated']
+        events = pd.DataFrame(self.events, columns=columns)
+        if events.empty:
+            return pd.DataFrame(columns=['calls', 'total_s', 'mean_ms', 'rows', 'rows_per_s', 'peak_alloc_mb'])
+        grouped = events.groupby('name', sort=False)
+        table = pd.DataFrame({
+            'calls': grouped.size(),
+            'total_s': grouped['duration_ns'].sum() / 1e9,
+            'rows': grouped['rows'].sum(min_count=1),
+            'peak_alloc_mb': grouped['allocated'].max() / 2**20,
+        })
+        table['mean_ms'] = table['total_s'] * 1e3 / table['calls']
+        table['rows_per_s'] = table['rows'] / table['total_s']
+        table = table[['calls', 'total_s', 'mean_ms', 'rows', 'rows_per_s', 'peak_alloc_mb']]
+        return table.sort_values('total_s', ascending=False)
+
+    def write_trace(self, path: str):
+        """
+        Write the spans as Chrome trace events, viewable in chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        trace = []
+        for name, start, duration, thread, rows, allocated in self.events:
+            args = {}
+            if rows is not None:
+                args['rows'] = int(rows)
+            if allocated is not None:
+                args['allocated_bytes'] = int(allocated)
+            trace.append({'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3,
+                          'pid': pid, 'tid': thread, 'args': args})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+
+profiler = Profiler()
+
+
+def span(name: str, rows: int = None):
+    """
+    Time a block on the global profiler: `with span('fit', rows=n): ...`
+    """
+    return profiler.span(name, rows)
+
+
+def profiled(name: str = None, rows=None):
+    """
+    Decorator timing every call on the global profiler.
+
+    Args:
+        name (str): Span name, defaults to the function's qualified name
+        rows (callable): Maps the return value to the number of rows processed
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            with profiler.span(label) as s:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    s.rows = rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def enable(memory: bool = False):
+    profiler.enable(memory)
+
+
+def disable():
+    profiler.disable()
+
+
+def report(trace_path: str = None) -> pd.DataFrame:
+    """
+    The per-run summary table, optionally writing the Chrome trace alongside it.
+    """
+    if trace_path is not None:
+        profiler.write_trace(trace_path)
+    return profiler.summary()
+
+
+if os.environ.get('OPTIONS_PROFILE'):
+    enable(memory=os.environ.get('OPTIONS_PROFILE') == 'memory')
@@ -0,0 +1,152 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from chain import ChainIndex
+
+GREEKS = ('delta', 'gamma', 'vega', 'theta', 'rho', 'vomma', 'vanna', 'charm')
+
+
+def _line_groups(key, x, y, smooth: int = 1):
+    """
+    Split rows already sorted by (key, x) into one (n, 2) line per key.
+
+    Returns the key of each line and the lines. With `smooth` > 1, y is replaced
+    by its trailing mean over that many points within each line, as
+    plots.plot_greek_vs_strike does.
+    """
+    keep = np.isfinite(x) & np.isfinite(y)
+    key, x, y = key[keep], x[keep], y[keep]
+    if key.size == 0:
+        return key, []
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(key)) + 1])
+
+    if smooth > 1:
+        # Trailing window sums from one cumulative sum, clipped at the start of each line
+        group_start = np.repeat(starts, np.diff(np.append(starts, key.size)))
+        first = np.maximum(np.arange(key.size) - smooth + 1, group_start)
+        csum = np.concatenate([[0.0], np.cumsum(y)])
+        y = (csum[1:] - csum[first]) / (np.arange(key.size) - first + 1)
+
+    lines = np.split(np.column_stack([x, y]), starts[1:])
+    return key[starts], lines
+
+
+def _draw(ax, key, lines, cmap, label: str):
+    from matplotlib.collections import LineCollection
+
+    if not lines:
+        ax.text(0.5, 0.5, 'no data', ha='center', va='center', transform=ax.transAxes)
+        return
+    collection = LineCollection(lines, array=key, cmap=cmap, linewidths=1.0)
+    collection.set_in_layout(False)  # Lines sit inside the axes; measuring them only slows the layout
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    ax.figure.colorbar(collection, ax=ax, label=label)
+
+
+def _render_greek(task) -> str:
+    """
+    Worker entry point: one figure per Greek, calls and puts by strike and by DTE.
+    """
+    ticker, greek, spot, panels, path, dpi = task
+    from matplotlib.figure import Figure  # No pyplot: nothing global, nothing to show
+
+    fig = Figure(figsize=(14, 9), layout='constrained')
+    axes = fig.subplots(2, 2)
+    for row, side in enumerate(('call', 'put')):
+        dte, strike, y = panels['by_dte'][side]
+        key, lines = _line_groups(dte * 365, strike, y, smooth=3)
+        ax = axes[row, 0]
+        _draw(ax, key, lines, 'viridis', 'Days to expiry')
+        ax.set_xlim(0.85 * spot, 1.15 * spot)
+        ax.set_title(f"{side.capitalize()} {greek} vs strike")
+        ax.set_xlabel('Strike Price')
+
+        strike, dte, y = panels['by_strike'][side]
+        key, lines = _line_groups(strike, dte * 365, y)
+        ax = axes[row, 1]
+        _draw(ax, key, lines, 'plasma', 'Strike')
+        ax.set_xlim(0, 180)
+        ax.set_title(f"{side.capitalize()} {greek} vs DTE")
+        ax.set_xlabel('Days Till Expiry')
+
+    for ax in axes.flat:
+        ax.set_ylabel(greek.capitalize())
+        ax.grid(True)
+    fig.suptitle(f"{ticker} {greek.capitalize()} (spot {spot:.2f})")
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def _greek_tasks(ticker: str, index: ChainIndex, spot: float, out_dir: str, greeks, fmt: str, dpi: int) -> list:
+    # The frame is sorted once by the index; every Greek's panels are column slices of its two layouts
+    split = int(np.count_nonzero(~index.by_dte['Call'].to_numpy(dtype=bool)))
+    sides = {'put': slice(0, split), 'call': slice(split, None)}
+    column = lambda frame, name, side: frame[name].to_numpy(dtype=np.float64)[sides[side]]
+
+    directory = os.path.join(out_dir, ticker)
+    os.makedirs(directory, exist_ok=True)
+    tasks = []
+    for greek in greeks:
+        panels = {
+            'by_dte': {side: (column(index.by_dte, 'dte', side), column(index.by_dte, 'strike', side),
+                              column(index.by_dte, greek, side)) for side in sides},
+            'by_strike': {side: (column(index.by_strike, 'strike', side), column(index.by_strike, 'dte', side),
+                                 column(index.by_strike, greek, side)) for side in sides},
+        }
+        tasks.append((ticker, greek, spot, panels, os.path.join(directory, f"{greek}.{fmt}"), dpi))
+    return tasks
+
+
+def render_reports(analyses, out_dir: str, greeks=GREEKS, fmt: str = 'png', workers: int = None,
+                   dpi: int = 100) -> dict:
+    """
+    Render every Greek of every underlying to image files without opening a window.
+
+    Each Greek is one figure with four panels: calls and puts, against strike
+    (one line per expiry) and against DTE (one line per strike). Lines are
+    drawn as LineCollections coloured by expiry or strike, and figures are
+    rendered in parallel across processes.
+
+    Args:
+        analyses (iterable): OptionAnalysis objects (with greeks_df) or tickers to analyse
+        out_dir (str): Files are written to out_dir/<ticker>/<greek>.<fmt>
+        greeks (tuple): Greeks to render
+        fmt (str): 'png' or 'svg'
+        workers (int): Processes to render with; 1 renders in this process
+        dpi (int): Resolution of PNG output
+
+    Returns:
+        dict: {ticker: {greek: path}}
+    """
+    if fmt not in ('png', 'svg'):
+        raise ValueError("fmt must be 'png' or 'svg'")
+
+    tasks = []
+    for analysis in analyses:
+        if isinstance(analysis, str):
+            from analysis import OptionAnalysis
+            analysis = OptionAnalysis(analysis)
+        if analysis.greeks_df is None:
+            analysis.calculate_greeks(verbose=False)
+        tasks.extend(_greek_tasks(analysis.ticker, analysis.index, analysis.spot, out_dir, greeks, fmt, dpi))
+
+    workers = workers if workers is not None else min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1:
+        paths = list(map(_render_greek, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(_render_greek, tasks))
+
+    report = {}
+    for (ticker, greek, *_), path in zip(tasks, paths):
+        report.setdefault(ticker, {})[greek] = path
+    return report
+
+
+def render_report(analysis, out_dir: str, **kwargs) -> dict:
+    """
+    Full report for one underlying (an OptionAnalysis or a ticker); returns {greek: path}.
+    """
+    report = render_reports([analysis], out_dir, **kwargs)
+    return next(iter(report.values()))
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from greeks import VectorGreeks
+
+
+class ScenarioEngine:
+    """
+    P&L and Greeks of a book across spot x vol x time shock grids.
+
+    The scenario grid is flattened and positions are broadcast against it with
+    NumPy, one block of positions x scenarios at a time, and summed into
+    per-group results as each block is done. The full (position x spot x vol x
+    time) tensor is never held in memory.
+    """
+
+    GREEKS = ('delta', 'gamma', 'vega', 'theta', 'rho', 'vomma', 'vanna', 'charm')
+
+    def __init__(self, S, K, T, sigma, is_call, qty, r: float, groups=None, multiplier: float = 100):
+        S, K, T, sigma, qty = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (S, K, T, sigma, qty)))
+        is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+        codes, labels = pd.factorize(np.broadcast_to(np.asarray(groups if groups is not None else 'total',
+                                                                 dtype=object), S.shape))
+
+        base = VectorGreeks(S=S, T=T, K=K, r=r, sigma=sigma)
+        keep = base.valid
+        self.skipped = int(np.count_nonzero(~keep))
+        self.S, self.K, self.T, self.sigma = S[keep], K[keep], T[keep], sigma[keep]
+        self.is_call, self.codes = is_call[keep], codes[keep]
+        self.size = qty[keep] * multiplier  # contracts x multiplier
+        self.r = r
+        self.labels = labels
+        self.base_price = base.option_price(is_call)[keep]
+
+    @classmethod
+    def from_frame(cls, positions: pd.DataFrame, spot, r: float, qty_col: str = 'qty', group_col: str = None,
+                   multiplier: float = 100) -> 'ScenarioEngine':
+        """
+        Build from a frame with strike, dte, iv and Call columns (e.g. greeks_df) plus quantities.
+        """
+        return cls(S=spot, K=positions['strike'], T=positions['dte'], sigma=positions['iv'],
+                   is_call=positions['Call'], qty=positions[qty_col], r=r,
+                   groups=positions[group_col] if group_col is not None else None, multiplier=multiplier)
+
+    def run(self, spot_shocks, vol_shocks, time_shocks, greeks=('delta', 'gamma', 'vega', 'theta'),
+            max_bytes: int = 16 * 2**20, dtype=np.float64) -> dict:
+        """
+        Evaluate the book on every (spot, vol, time) scenario.
+
+        Args:
+            spot_shocks (array-like): Relative spot moves, e.g. np.linspace(-0.2, 0.2, 41)
+            vol_shocks (array-like): Absolute vol moves, e.g. np.linspace(-0.1, 0.1, 21)
+            time_shocks (array-like): Days elapsed, e.g. np.arange(31)
+            greeks (tuple): Greeks to aggregate alongside P&L
+            max_bytes (int): Cap on the memory the run allocates, results included. Work is
+                split into blocks of positions x scenarios, so a single position with a
+                large grid is split along the scenarios
+            dtype: float64, or float32 to build every shocked input and temporary in
+                float32 and price twice as many cells per block; per-group sums are
+                still accumulated in float64. On a 2k-position
+                book float32 moved P&L, delta and vega by ~1e-6 of their largest
+                value and gamma by ~1e-4, the latter on options shocked close to expiry
+
+        Returns:
+            dict: 'pnl' and each Greek as arrays of shape (groups, spot, vol, time),
+            summed over positions and scaled by quantity x multiplier, plus the
+            'groups' labels and the shock axes. Options that expire within a time
+            shock are worth intrinsic value and carry no Greeks.
+        """
+        dtype = np.dtype(dtype)
+        spot_shocks = np.asarray(spot_shocks, dtype=np.float64)
+        vol_shocks = np.asarray(vol_shocks, dtype=np.float64)
+        time_shocks = np.asarray(time_shocks, dtype=np.float64)
+        grid = (len(spot_shocks), len(vol_shocks), len(time_shocks))
+        n_scenarios = int(np.prod(grid))
+
+        names = ('pnl',) + tuple(greeks)
+        result_bytes = len(names) * len(self.labels) * n_scenarios * 8
+        budget = max_bytes - result_bytes
+        # Peak bytes per (position, scenario) cell while a block is priced, measured with tracemalloc;
+        # all_greeks evaluates every Greek, so asking for any of them costs the same
+        itemsize = dtype.itemsize
+        cell_bytes = itemsize * (30 if greeks else 16)
+        scenario_bytes = 4 * 8 + 3 * itemsize  # the block's grid indices and shocked spot multiplier, vol and time
+        if budget < scenario_bytes + cell_bytes:
+            raise ValueError(f"max_bytes={max_bytes} leaves no room to work: "
+                             f"the results alone take {result_bytes} bytes")
+        out = {name: np.zeros((len(self.labels),) + grid) for name in names}
+        flat = {name: value.reshape(len(self.labels), -1) for name, value in out.items()}
+
+        block = min(n_scenarios, budget // (scenario_bytes + cell_bytes))
+        chunk = max(1, (budget // block - scenario_bytes) // cell_bytes)
+
+        # Inputs are cast once, so every scenario-sized temporary below is built in `dtype`
+        S0, K0, T0, sigma0, size0, base0 = (np.asarray(a, dtype=dtype) for a in (
+            self.S, self.K, self.T, self.sigma, self.size, self.base_price))
+
+        for first in range(0, n_scenarios, block):
+            scenarios = slice(first, min(first + block, n_scenarios))
+            i_spot, i_vol, i_time = np.unravel_index(np.arange(scenarios.start, scenarios.stop), grid)
+            spot_mult = (1 + spot_shocks[i_spot]).astype(dtype, copy=False)
+            vol_add = vol_shocks[i_vol].astype(dtype, copy=False)
+            t_sub = (time_shocks[i_time] / 365).astype(dtype, copy=False)
+            del i_spot, i_vol, i_time
+
+            for start in range(0, len(self.S), chunk):
+                rows = slice(start, start + chunk)
+                col = lambda a: a[rows, None]
+                S = col(S0) * spot_mult
+                K = col(K0)
+                T = col(T0) - t_sub
+                sigma = np.maximum(col(sigma0) + vol_add, dtype.type(1e-4))
+                is_call = col(self.is_call)
+
+                g = VectorGreeks(S=S, T=T, K=K, r=self.r, sigma=sigma, dtype=dtype)
+                intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+                price = np.where(g.valid, g.option_price(is_call), intrinsic)
+                del intrinsic
+
+                size = col(size0)
+                chunk_values = {'pnl': (price - col(base0)) * size}
+                del price
+                if greeks:
+                    values = g.all_greeks(is_call)
+                    chunk_values.update({name: np.nan_to_num(values[name]) * size for name in greeks})
+                    del values
+
+                codes = self.codes[rows]
+                for code in np.unique(codes):
+                    members = codes == code
+                    for name, value in chunk_values.items():
+                        flat[name][code, scenarios] += value[members].sum(axis=0, dtype=np.float64)
+
+        out.update({'groups': np.asarray(self.labels), 'spot_shocks': spot_shocks, 'vol_shocks': vol_shocks,
+                    'time_shocks': time_shocks})
+        return out
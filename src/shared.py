@@ -0,0 +1,232 @@
+import json
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+MAGIC = b'OPTSHM01'
+SCHEMA_BYTES = 32 * 1024
+# Header: magic, then uint64 fields, then one JSON schema area per slot; data starts page-aligned
+_VERSION, _ACTIVE, _CAPACITY, _SCHEMA_LEN = 1, 2, 3, 4  # uint64 field indices; _SCHEMA_LEN + slot
+DATA_OFFSET = 4096 * -(-(64 + 2 * SCHEMA_BYTES) // 4096)
+ALIGN = 64
+
+
+def segment_name(ticker: str) -> str:
+    return f"optchain_{ticker.replace('^', '_')}"
+
+
+def _column_array(column: pd.Series) -> np.ndarray:
+    # Fixed-width arrays only: datetimes as naive UTC datetime64[ns], text as fixed-width unicode
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return pd.to_datetime(column, utc=True).dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+    if pd.api.types.is_bool_dtype(column) and not column.isna().any():
+        return column.to_numpy(dtype=bool)
+    if pd.api.types.is_numeric_dtype(column):
+        return column.to_numpy(dtype=np.float64 if column.isna().any() else None, na_value=np.nan)
+    return column.astype(str).to_numpy(dtype=str)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Readers must not unlink the segment when they exit, so keep it away from the resource tracker
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no track flag; skip the registration instead
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == 'shared_memory' else register(name, rtype)
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class ChainPublisher:
+    """
+    Publishes chain snapshots and their Greeks into one shared memory segment.
+
+    The segment holds a small header and two data slots. Each publish writes
+    the inactive slot, then flips the active slot. The header's version counter
+    works as a seqlock: it is odd while a publish is in progress and goes up by
+    two per snapshot. Readers never lock. A reader's views stay intact until
+    the writer starts reusing their slot, two publishes later.
+    """
+
+    def __init__(self, name: str, capacity: int = None):
+        self.name = name
+        self.capacity = capacity  # bytes per slot; sized from the first snapshot when None
+        self._shm = None
+        self._fields = None
+
+    def _create(self, needed: int):
+        capacity = max(self.capacity or 0, 2 * needed, ALIGN)
+        self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=DATA_OFFSET + 2 * capacity)
+        self._shm.buf[:len(MAGIC)] = MAGIC
+        self._fields = np.ndarray((8,), dtype=np.uint64, buffer=self._shm.buf, offset=0)
+        self._fields[1:] = 0
+        self._fields[_CAPACITY] = capacity
+        self.capacity = capacity
+
+    def publish(self, tables: dict, **meta) -> int:
+        """
+        Publish a snapshot of one or more tables.
+
+        Parameters
+        ----------
+        tables : dict
+            Name -> DataFrame, e.g. {'chain': options, 'greeks': greeks_df}.
+        **meta
+            JSON-serialisable scalars stored with the snapshot (ticker, spot, r, ...).
+
+        Returns
+        ----------
+        int: The version of the published snapshot.
+        """
+        columns, offset = [], 0
+        for table, frame in tables.items():
+            for name in frame.columns:
+                values = np.ascontiguousarray(_column_array(frame[name]))
+                columns.append((table, str(name), values, offset))
+                offset += -(-values.nbytes // ALIGN) * ALIGN
+        if self._shm is None:
+            self._create(offset)
+        if offset > self.capacity:
+            raise ValueError(f"Snapshot needs {offset} bytes but slots hold {self.capacity}; "
+                             "create the publisher with a larger capacity")
+
+        schema = {'meta': meta, 'published': time.time(),
+                  'rows': {table: len(frame) for table, frame in tables.items()},
+                  'columns': [{'table': table, 'name': name, 'dtype': values.dtype.str, 'offset': col_offset}
+                              for table, name, values, col_offset in columns]}
+        encoded = json.dumps(schema, default=str).encode()
+        if len(encoded) > SCHEMA_BYTES:
+            raise ValueError("Snapshot schema does not fit in the header")
+
+        fields = self._fields
+        slot = 1 - int(fields[_ACTIVE]) if fields[_VERSION] else 0
+        base = DATA_OFFSET + slot * self.capacity
+        fields[_VERSION] += 1  # odd: the inactive slot is being rewritten
+        for _, _, values, col_offset in columns:
+            start = base + col_offset
+            self._shm.buf[start:start + values.nbytes] = values.view(np.uint8).reshape(-1)
+        schema_start = 64 + slot * SCHEMA_BYTES
+        self._shm.buf[schema_start:schema_start + len(encoded)] = encoded
+        fields[_SCHEMA_LEN + slot] = len(encoded)
+        fields[_ACTIVE] = slot
+        fields[_VERSION] += 1
+        return int(fields[_VERSION])
+
+    def publish_ticker(self, ticker: str, context=None) -> int:
+        """
+        Fetch the chain and compute its Greeks once, and publish both for other processes.
+        """
+        from analysis import OptionAnalysis
+
+        analysis = OptionAnalysis(ticker, context=context)
+        analysis.calculate_greeks(verbose=False)
+        return self.publish({'chain': analysis.options, 'greeks': analysis.greeks_df},
+                            ticker=ticker, spot=float(analysis.spot), r=float(analysis.r))
+
+    def close(self, unlink: bool = True):
+        if self._shm is not None:
+            self._fields = None
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedSnapshot:
+    """
+    One published snapshot: read-only, zero-copy NumPy views into shared memory.
+    """
+
+    def __init__(self, reader: 'ChainReader', version: int, schema: dict, tables: dict):
+        self._reader = reader
+        self.version = version
+        self.meta = schema['meta']
+        self.published = schema['published']
+        self.tables = tables  # {table: {column: ndarray}}
+
+    def intact(self) -> bool:
+        """
+        False once the writer has started overwriting this snapshot's slot; check after using the views.
+        """
+        return self._reader.version <= self.version + 2
+
+    def frame(self, table: str, copy: bool = False) -> pd.DataFrame:
+        """
+        A table as a DataFrame; with `copy` it stays valid after the slot is reused.
+        """
+        columns = self.tables[table]
+        if copy:
+            columns = {name: values.copy() for name, values in columns.items()}
+        return pd.DataFrame(columns, copy=False)
+
+
+class ChainReader:
+    """
+    Attaches to a ChainPublisher's segment and hands out snapshots without locking.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._shm = _attach(name)
+        if bytes(self._shm.buf[:len(MAGIC)]) != MAGIC:
+            self._shm.close()
+            raise ValueError(f"Shared memory segment {name!r} was not written by ChainPublisher")
+        self._fields = np.ndarray((8,), dtype=np.uint64, buffer=self._shm.buf, offset=0)
+
+    @property
+    def version(self) -> int:
+        return int(self._fields[_VERSION])
+
+    def changed(self, since: SharedSnapshot) -> bool:
+        return self.version != since.version
+
+    def snapshot(self, timeout: float = 1.0) -> SharedSnapshot:
+        """
+        The latest complete snapshot.
+
+        Retries while a publish is in progress, up to `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            version = self.version
+            if version and version % 2 == 0:
+                slot = int(self._fields[_ACTIVE])
+                length = int(self._fields[_SCHEMA_LEN + slot])
+                start = 64 + slot * SCHEMA_BYTES
+                raw = bytes(self._shm.buf[start:start + length])
+                if self.version == version:
+                    break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No complete snapshot in {self.name!r} within {timeout}s")
+            time.sleep(0.0005)
+
+        schema = json.loads(raw)
+        base = DATA_OFFSET + slot * int(self._fields[_CAPACITY])
+        tables = {table: {} for table in schema['rows']}
+        for column in schema['columns']:
+            view = np.ndarray((schema['rows'][column['table']],), dtype=np.dtype(column['dtype']),
+                              buffer=self._shm.buf, offset=base + column['offset'])
+            view.flags.writeable = False
+            tables[column['table']][column['name']] = view
+        return SharedSnapshot(self, version, schema, tables)
+
+    def close(self):
+        # Views from snapshots keep the mapping alive; drop them (or copy what is needed) first
+        self._fields = None
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,234 @@
+import asyncio
+import inspect
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from importlib import import_module
+import pandas as pd
+import data as dt
+from analysis import OptionAnalysis
+from surface import expiry_tasks
+
+orc_wing = import_module('ORC-WING')
+
+
+class DirectorySource:
+    """
+    Replays the snapshots in a SnapshotCache directory in fetch-time order.
+
+    Yields snapshot dicts with 'ticker', 'timestamp', 'chain' (raw chain frame)
+    and 'spot' (None, so it is inferred from put-call parity).
+    """
+
+    def __init__(self, directory: str, tickers=None, fmt: str = 'parquet'):
+        self.cache = dt.SnapshotCache(directory, offline=True, fmt=fmt)
+        self.tickers = tickers
+
+    def __iter__(self):
+        tickers = self.tickers
+        if tickers is None:
+            tickers = sorted({name.split('__')[0] for name in os.listdir(self.cache.directory) if '__' in name})
+        snapshots = sorted((stamp, ticker, path) for ticker in tickers for stamp, path in self.cache.snapshots(ticker))
+        for stamp, ticker, path in snapshots:
+            yield {'ticker': ticker, 'timestamp': stamp, 'chain': self.cache.read(path), 'spot': None}
+
+
+class SocketSource:
+    """
+    Reads snapshots from a local socket as newline-delimited JSON.
+
+    Each line is {"ticker": ..., "timestamp": ISO time, "spot": optional float,
+    "chain": [records with the raw options_chain columns]}.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9009):
+        self.host = host
+        self.port = port
+        self._conn = None
+        self._closed = False
+
+    def close(self):
+        """
+        Shut the connection down, so a read blocked on an idle feed returns at once.
+        """
+        self._closed = True
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # already closed by the peer
+
+    def __iter__(self):
+        with socket.create_connection((self.host, self.port)) as conn, conn.makefile('r') as lines:
+            self._conn = conn
+            if self._closed:  # closed while connecting
+                return
+            for line in lines:
+                if not line.strip():
+                    continue
+                message = json.loads(line)
+                chain = pd.DataFrame.from_records(message['chain'])
+                chain['expirationDate'] = pd.to_datetime(chain['expirationDate'])
+                yield {'ticker': message['ticker'], 'timestamp': pd.Timestamp(message['timestamp']).to_pydatetime(),
+                       'chain': chain, 'spot': message.get('spot')}
+
+
+class SnapshotBuffer:
+    """
+    Bounded hand-off between the source thread and the processing loop.
+
+    With policy 'drop_stale' a newer snapshot of a ticker replaces the one still
+    waiting for it, so slow calibration never processes outdated chains. With
+    'block' nothing is dropped. In both cases the producer blocks once
+    `capacity` snapshots are waiting (backpressure).
+    """
+
+    def __init__(self, capacity: int = 4, policy: str = 'drop_stale'):
+        if policy not in ('drop_stale', 'block'):
+            raise ValueError("policy must be 'drop_stale' or 'block'")
+        self.capacity = capacity
+        self.policy = policy
+        self.dropped = 0
+        self._pending = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, snapshot) -> bool:
+        """
+        Queue a snapshot; returns False once the buffer has been closed.
+        """
+        with self._cond:
+            if self.policy == 'drop_stale':
+                for i, waiting in enumerate(self._pending):
+                    if waiting['ticker'] == snapshot['ticker']:
+                        self._pending[i] = snapshot
+                        self.dropped += 1
+                        self._cond.notify_all()
+                        return not self._closed
+            while len(self._pending) >= self.capacity and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return False
+            self._pending.append(snapshot)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """
+        Next snapshot, or None once the buffer is closed and drained.
+        """
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            snapshot = self._pending.popleft()
+            self._cond.notify_all()
+            return snapshot
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def process_snapshot(snapshot, r: float, calibrator) -> dict:
+    """
+    Vectorized Greeks and per-expiry ORC-Wing fits for one chain snapshot.
+    """
+    ticker = snapshot['ticker']
+    options = dt.postprocess_chain(snapshot['chain'].copy(), now=snapshot['timestamp'])
+    options = options.drop(columns='ticker', errors='ignore')
+    spot = snapshot.get('spot')
+    if spot is None:
+        spot = dt.implied_spot(options, r)
+
+    greeks = OptionAnalysis.from_chain(ticker, options, spot, r).calculate_greeks(verbose=False)
+
+    tasks, info = expiry_tasks(ticker, options, spot, r)
+    fits = {}
+    for key, moneyness, iv, vega, _ in tasks:
+        try:
+            fits[key[1]] = {**info[key], **calibrator.fit(moneyness, iv, vega, key=key)}
+        except ValueError:
+            continue
+
+    return {
+        'ticker': ticker,
+        'timestamp': snapshot['timestamp'],
+        'spot': spot,
+        'greeks': greeks,
+        'fits': pd.DataFrame.from_dict(fits, orient='index').rename_axis('expiry'),
+    }
+
+
+def replay(source, r: float, capacity: int = 4, policy: str = 'drop_stale', calibrator=None):
+    """
+    Stream Greeks and ORC-Wing fits for every snapshot a source produces.
+
+    The source is read on a background thread into a SnapshotBuffer, so memory
+    stays bounded by `capacity` snapshots however slow processing is. The
+    calibrator is shared across ticks, so each expiry warm-starts from its last fit.
+    Closing the generator calls the source's close() (if it has one, e.g.
+    SocketSource) so a reader blocked on I/O stops without waiting for data.
+
+    Yields
+    ------
+    dict
+        The process_snapshot result plus 'latency' (seconds from buffering to
+        result) and 'dropped' (stale snapshots skipped so far).
+    """
+    calibrator = calibrator if calibrator is not None else orc_wing.OrcWingCalibrator()
+    buffer = SnapshotBuffer(capacity, policy)
+    failure = []
+
+    def produce():
+        try:
+            for snapshot in source:
+                snapshot['received'] = time.perf_counter()
+                if not buffer.put(snapshot):
+                    break
+        except Exception as exc:
+            failure.append(exc)
+        finally:
+            buffer.close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            snapshot = buffer.get()
+            if snapshot is None:
+                break
+            result = process_snapshot(snapshot, r, calibrator)
+            result['latency'] = time.perf_counter() - snapshot['received']
+            result['dropped'] = buffer.dropped
+            yield result
+    finally:
+        buffer.close()
+        # A generator cannot be closed from this thread while the producer is inside it
+        if callable(getattr(source, 'close', None)) and not inspect.isgenerator(source):
+            source.close()
+        producer.join(timeout=1.0)  # daemon thread: a source that ignores close is left behind
+    if failure:
+        raise failure[0]
+
+
+async def areplay(source, r: float, capacity: int = 4, policy: str = 'drop_stale', calibrator=None):
+    """
+    Async-iterator front end to replay; each result is computed off the event loop.
+    """
+    results = replay(source, r, capacity, policy, calibrator)
+    done = object()
+    try:
+        while True:
+            result = await asyncio.to_thread(next, results, done)
+            if result is done:
+                break
+            yield result
+    finally:
+        results.close()
@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+import numpy as np
+import pandas as pd
+from data import options_chains, market_context
+
+orc_wing = import_module('ORC-WING')
+
+_calibrator = None
+
+
+def _calibrate_expiry(task):
+    """
+    Worker entry point: fit one expiry from its compact arrays.
+
+    Each process keeps a single calibrator so repeated tasks reuse its setup.
+    """
+    global _calibrator
+    if _calibrator is None:
+        _calibrator = orc_wing.OrcWingCalibrator()
+
+    key, moneyness, iv, vega, x0 = task
+    try:
+        fit = _calibrator.fit(moneyness, iv, vega, x0=x0)
+    except ValueError:
+        fit = dict.fromkeys(orc_wing.OrcWingCalibrator.PARAM_NAMES, np.nan)
+        fit.update({'loss': np.nan, 'success': False, 'nit': 0})
+    return key, fit
+
+
+def expiry_tasks(ticker: str, options: pd.DataFrame, spot: float, r: float, previous: pd.DataFrame = None):
+    """
+    Split one ticker's chain by expirationDate into calibration tasks.
+
+    Returns
+    ----------
+    tuple: (tasks, info) where each task is (key, moneyness, iv, vega, x0) with
+    key = (ticker, expiry), and info maps each key to its T, F and option count.
+    """
+    tasks, info = [], {}
+    for expiry, options_for_exp in options.groupby('expirationDate', sort=True):
+        T = options_for_exp['dte'].iloc[0]
+        if T <= 0:
+            continue
+        F = spot * np.exp(r * T)
+        moneyness, iv, vega = orc_wing.calibration_arrays(options_for_exp, F, spot, r)
+        if moneyness.size == 0:
+            continue
+
+        key = (ticker, expiry)
+        x0 = None
+        if previous is not None and key in previous.index and previous.loc[key, 'success']:
+            x0 = previous.loc[key, list(orc_wing.OrcWingCalibrator.PARAM_NAMES)].to_numpy(dtype=float)
+        tasks.append((key, moneyness, iv, vega, x0))
+        info[key] = {'T': T, 'F': F, 'n_options': int(moneyness.size)}
+    return tasks, info
+
+
+def build_surface(tickers, workers: int = None, previous: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calibrate ORC-Wing for every expiry of every ticker, without any user input.
+
+    Chains for all tickers are fetched concurrently and split by expirationDate; each expiry is
+    reduced to its moneyness, IV and vega arrays and calibrated on a process pool.
+
+    Parameters
+    ----------
+    tickers : list of str
+        Yahoo Finance ticker symbols.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs; 1 runs in-process.
+    previous : pd.DataFrame, optional
+        An earlier result of build_surface, used to warm-start matching expiries.
+
+    Returns
+    ----------
+    pd.DataFrame: One row of fitted parameters per (ticker, expiry).
+    """
+    chains = options_chains(tickers)
+    tasks, info = [], {}
+    for ticker, options in chains.groupby('ticker', sort=False):
+        context = market_context(ticker)
+        ticker_tasks, ticker_info = expiry_tasks(ticker, options, context.spot, context.r, previous)
+        tasks.extend(ticker_tasks)
+        info.update(ticker_info)
+
+    return calibrate_tasks(tasks, info, workers)
+
+
+def calibrate_tasks(tasks, info: dict, workers: int = None) -> pd.DataFrame:
+    """
+    Calibrate expiry tasks from expiry_tasks on a process pool.
+
+    Parameters
+    ----------
+    tasks, info :
+        As returned by expiry_tasks, possibly concatenated over several tickers.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs; 1 runs in-process.
+
+    Returns
+    ----------
+    pd.DataFrame: One row of fitted parameters per (ticker, expiry); empty, with
+    the same index and columns, when there are no tasks.
+    """
+    if not tasks:
+        index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=['ticker', 'expiry'])
+        columns = ['T', 'F', 'n_options', *orc_wing.OrcWingCalibrator.PARAM_NAMES, 'loss', 'success', 'nit']
+        return pd.DataFrame(index=index, columns=columns, dtype=float).astype(
+            {'n_options': int, 'success': bool, 'nit': int})
+
+    if workers == 1:
+        results = list(map(_calibrate_expiry, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_calibrate_expiry, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    rows = [{**info[key], **fit} for key, fit in results]
+    index = pd.MultiIndex.from_tuples([key for key, _ in results], names=['ticker', 'expiry'])
+    return pd.DataFrame(rows, index=index)